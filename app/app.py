@@ -3,19 +3,60 @@ import sys
 import os
 import streamlit as st
 import pandas as pd
-import time
 import altair as alt
+from datetime import datetime
+from functools import partial
 
 # Add src path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from src.face_gaze_tracker import FaceGazeTracker
+from src.instrumentation import save_summary, stage_summary_path
+from src.live_session import LiveTrackingSession
+from src.log_cache import IncrementalLogLoader
+from src.log_rollups import open_rollups
 from src.loop_detector import LoopDetector
-from src.pattern_logger import log_pattern
+from src.loop_model import LoopClassifier, append_session_features
+from src.pattern_logger import AsyncPatternLogger
+from src.preview import PreviewPublisher
+from src.sqlite_log_store import is_sqlite_path, open_store
+from src.utils import is_parquet_path
 
 # Streamlit config
 st.set_page_config(page_title="MirrorMind", layout="wide")
 st.title("🧠 MirrorMind – Real-Time Loop Behavior Detection")
 
+# The SQLite or Parquet log is used once it has been created with
+# `python mirrormind.py import-log`, otherwise the CSV log
+LOG_CSV_PATH = "data/loop_log_dataset.csv"
+LOG_DB_PATH = "data/loop_log.db"
+LOG_PARQUET_PATH = "data/loop_log.parquet"
+PREVIEW_PORT = 8554
+LOG_PATH = next((path for path in (LOG_DB_PATH, LOG_PARQUET_PATH) if os.path.exists(path)), LOG_CSV_PATH)
+
+# Log writes happen on a background thread shared by all sessions
+@st.cache_resource
+def get_pattern_logger():
+    return AsyncPatternLogger()
+
+
+pattern_logger = get_pattern_logger()
+
+
+# Trained loop model, loaded on first prediction (rule engine if absent)
+@st.cache_resource
+def get_loop_classifier():
+    return LoopClassifier()
+
+
+@st.cache_resource
+def get_log_loader(path):
+    return IncrementalLogLoader(path)
+
+
+if is_parquet_path(LOG_PATH):
+    from src.parquet_log_store import open_store as open_parquet_store
+    open_parquet_store(LOG_PATH).start_compaction()  # Merges the small per-session files hourly
+
 # Tabs
 tab1, tab2 = st.tabs(["📸 Live Loop Tracker", "📊 Loop Log Viewer"])
 
@@ -24,43 +65,114 @@ tab1, tab2 = st.tabs(["📸 Live Loop Tracker", "📊 Loop Log Viewer"])
 # ========================
 with tab1:
     st.subheader("🛁 Real-Time Detection (Press 'Start')")
-    st.markdown("🧪 Press 'q' in the live window to stop detection")
+    st.markdown("🧪 Detection runs in the background, press 'Stop' to end the session")
 
-    if st.button("▶️ Start Detection"):
-        tracker = FaceGazeTracker()
-        detector = LoopDetector()
+    def log_episode(episode, started_at):
+        # Runs on the tracking thread each time a loop episode closes
+        break_suggested = "Yes" if episode.loop_type in ["EscapeLoop", "FreezeLoop"] else "No"
+        pattern_logger.log_pattern(
+            pattern="DetectedGazePattern",
+            loop_type=episode.loop_type,
+            duration_sec=episode.duration,
+            context=episode.context or "AutoDetect",
+            break_suggested=break_suggested,
+            file_path=LOG_PATH,
+            timestamp=datetime.fromtimestamp(started_at + episode.start)
+        )
 
+    def finish_session(gaze_info, duration):
+        # Runs on the tracking thread once the stream ends; every episode is
+        # already logged, the summary shows the loop type with the most time
         pattern = "DetectedGazePattern"
-        start_time = time.time()
+        context = gaze_info.get("context", "AutoDetect")
+        time_by_loop = {}
+        for episode in gaze_info.get("episodes", []):
+            time_by_loop[episode.loop_type] = time_by_loop.get(episode.loop_type, 0.0) + episode.duration
+        loop_type = max(time_by_loop, key=time_by_loop.get) if time_by_loop \
+            else LoopDetector().classify_loop(gaze_info, duration)
+        break_suggested = "Yes" if loop_type in ["EscapeLoop", "FreezeLoop"] else "No"
+        append_session_features(gaze_info, duration, context, loop_type)  # Training data for the model
+        classifier = get_loop_classifier()
+        model_loop_type = classifier.predict(gaze_info, duration, context) if classifier.available else None
+        stage_timings = gaze_info.get("stage_timings")
+        stages_path = None
+        if stage_timings:
+            try:
+                stages_path = save_summary(stage_summary_path(LOG_PATH, stage_timings["started_at"]), stage_timings)
+            except OSError as e:
+                print("❌ Stage timings could not be saved:", e)
 
-        # ✅ Start live stream (no loop here)
-        tracker.stream_gaze_overlay_live()
+        pattern_logger.flush()  # Session is over, make the rows visible to the log viewer
+        return {
+            "loop_type": loop_type,
+            "pattern": pattern,
+            "duration": duration,
+            "context": context,
+            "break_suggested": break_suggested,
+            "episodes": len(gaze_info.get("episodes", [])),
+            "model_loop_type": model_loop_type,
+            "stages_path": stages_path
+        }
 
-        # After stream ends (user presses 'q')
-        duration = time.time() - start_time
-        gaze_info = tracker.final_gaze_info
-        context = gaze_info.get("context", "AutoDetect")
+    # One tracking worker per browser session, kept across reruns. It runs
+    # headless; annotated frames reach the page through the preview publisher.
+    # Stage timings are collected and saved next to the log after each session.
+    if "live_session" not in st.session_state:
+        st.session_state.live_session = LiveTrackingSession(
+            tracker_factory=partial(FaceGazeTracker, instrument=True),
+            on_finish=finish_session, on_episode=log_episode, preview=PreviewPublisher()
+        )
+    live_session = st.session_state.live_session
+    preview = live_session.preview
 
-        loop_type = detector.classify_loop(gaze_info, duration)
-        if gaze_info.get("smile_detected"):
-            loop_type = "ComparisonLoop"
+    show_preview = st.checkbox("🎥 Show live preview", value=True)
+    if st.checkbox(f"🌐 Serve MJPEG preview on http://127.0.0.1:{PREVIEW_PORT}"):
+        try:
+            preview.serve(port=PREVIEW_PORT)
+        except OSError as e:
+            st.warning(f"⚠️ Preview server unavailable: {e}")
 
-        break_suggested = "Yes" if loop_type in ["EscapeLoop", "FreezeLoop"] else "No"
+    col1, col2 = st.columns(2)
+    col1.button("▶️ Start Detection", on_click=live_session.start, disabled=live_session.running)
+    col2.button("⏹️ Stop Detection", on_click=live_session.stop, disabled=not live_session.running)
 
-        log_pattern(
-            pattern=pattern,
-            loop_type=loop_type,
-            duration_sec=duration,
-            context=context,
-            break_suggested=break_suggested,
-            file_path="data/loop_log_dataset.csv"
-        )
+    @st.fragment(run_every=0.5)
+    def live_status():
+        # Only this block reruns while tracking, the rest of the page stays put
+        state = live_session.snapshot()
+        if state["running"]:
+            metrics = st.columns(5)
+            metrics[0].metric("🔁 Loop", state["loop_status"] or "…")
+            metrics[1].metric("📎 Context", state["context"] or "…")
+            metrics[2].metric("⏱️ Duration", f"{state['duration']} sec")
+            metrics[3].metric("🎞️ FPS", state["fps"])
+            metrics[4].metric("⌛ Latency", f"{state['latency_ms']} ms")
+            st.caption(f"🎨 Overlay: {state['overlay_ms']} ms/frame · 🚮 Dropped frames: {state['dropped_frames']}")
+            if state["stages"]:
+                st.caption(f"📏 {state['stages']}")
+            if state["last_episode"] is not None:
+                episode = state["last_episode"]
+                st.caption(f"🧩 {state['episodes']} episode(s) logged, last: {episode.loop_type} "
+                           f"for {int(episode.duration)} sec")
+            jpeg = preview.latest_jpeg()
+            if show_preview and jpeg is not None:
+                st.image(jpeg, caption="🧠 MirrorMind Live")
+        elif state["error"]:
+            st.error(f"❌ Live tracking failed: {state['error']}")
+        elif state["result"]:
+            result = state["result"]
+            st.success(f"🔁 Loop Detected: {result['loop_type']}")
+            st.write(f"📌 Pattern: {result['pattern']}")
+            st.write(f"⏱️ Duration: {int(result['duration'])} sec")
+            st.write(f"📎 Context: {result['context']}")
+            st.write(f"🚨 Break Suggested: {result['break_suggested']}")
+            st.write(f"🧩 Episodes logged: {result['episodes']}")
+            if result["model_loop_type"]:
+                st.write(f"🤖 Model Prediction: {result['model_loop_type']}")
+            if result["stages_path"]:
+                st.caption(f"📏 Stage timings saved to {result['stages_path']}")
 
-        st.success(f"🔁 Loop Detected: {loop_type}")
-        st.write(f"📌 Pattern: {pattern}")
-        st.write(f"⏱️ Duration: {int(duration)} sec")
-        st.write(f"📎 Context: {context}")
-        st.write(f"🚨 Break Suggested: {break_suggested}")
+    live_status()
 
 # ========================
 # 📊 LOG VIEWER
@@ -69,14 +181,63 @@ with tab2:
     st.subheader("📄 Loop Log Dataset")
 
     try:
-        df = pd.read_csv("data/loop_log_dataset.csv")
-        st.dataframe(df.tail(10), use_container_width=True)
+        if is_sqlite_path(LOG_PATH):
+            # Filtered aggregates run in SQLite, only small results reach pandas
+            store = open_store(LOG_PATH)
+            col1, col2 = st.columns(2)
+            filters = {
+                "loop_types": col1.multiselect("Loop types", store.distinct("loop_type")),
+                "contexts": col2.multiselect("Contexts", store.distinct("context"))
+            }
+            recent_df = pd.DataFrame(store.recent(10, **filters))
+            loop_counts = pd.Series({value: count for value, count, _ in store.count_by("loop_type", **filters)})
+            break_counts = pd.Series({value: count for value, count, _ in store.count_by("break_suggested", **filters)})
+            patterns_df = recent_df[["pattern", "context"]].tail(5) if not recent_df.empty else None
+            filtered = any(filters.values())
+        elif is_parquet_path(LOG_PATH):
+            # Recent rows come from the latest day partitions only; with a date
+            # range or loop types set, the counts scan just those two columns
+            # with the filters pushed down
+            store = open_parquet_store(LOG_PATH)
+            col1, col2 = st.columns(2)
+            date_range = col1.date_input("Date range", value=())
+            loop_types = col2.multiselect("Loop types", [
+                "Normal", "FreezeLoop", "EscapeLoop", "DoubtLoop", "ComparisonLoop", "ConsumptionLoop"
+            ])
+            filters = {
+                "start_date": date_range[0] if len(date_range) > 0 else None,
+                "end_date": date_range[1] if len(date_range) > 1 else None,
+                "loop_types": loop_types
+            }
+            recent_df = store.recent(10, **filters).to_pandas()
+            patterns_df = recent_df[["pattern", "context"]].tail(5)
+            filtered = bool(date_range) or bool(loop_types)
+            if filtered:
+                counts_df = store.read_pandas(columns=["loop_type", "break_suggested"], **filters)
+                loop_counts = counts_df["loop_type"].value_counts()
+                break_counts = counts_df["break_suggested"].value_counts()
+        else:
+            # Only rows appended since the last rerun are parsed
+            log_loader = get_log_loader(LOG_PATH)
+            log_loader.refresh()
+            recent_df = log_loader.tail(10)
+            patterns_df = recent_df[["Pattern", "Context"]].tail(5) \
+                if "Pattern" in recent_df.columns and "Context" in recent_df.columns else None
+            filtered = False
+
+        # Unfiltered charts read the rollups kept up to date by the logging path
+        rollups = open_rollups(LOG_PATH)
+        if not filtered:
+            loop_counts = pd.Series({value: count for value, count, _ in rollups.totals("LoopType")})
+            break_counts = pd.Series({value: count for value, count, _ in rollups.totals("BreakSuggested")})
+
+        st.dataframe(recent_df, use_container_width=True)
 
         st.subheader("📊 Loop Type Distribution")
-        st.bar_chart(df["LoopType"].value_counts())
+        st.bar_chart(loop_counts)
 
         st.subheader("🚦 Break Suggestions Summary")
-        break_df = df["BreakSuggested"].value_counts().reset_index()
+        break_df = break_counts.reset_index()
         break_df.columns = ['BreakSuggested', 'Count']
         pie = alt.Chart(break_df).mark_arc().encode(
             theta=alt.Theta(field="Count", type="quantitative"),
@@ -85,9 +246,14 @@ with tab2:
         )
         st.altair_chart(pie, use_container_width=True)
 
+        st.subheader("📅 Daily Loop Activity")
+        daily = pd.DataFrame(rollups.series("LoopType", "day"), columns=["Day", "LoopType", "Count", "DurationSec"])
+        if not daily.empty:
+            st.bar_chart(daily.pivot(index="Day", columns="LoopType", values="Count").fillna(0))
+
         st.subheader("🧠 Recent Patterns")
-        if "Pattern" in df.columns and "Context" in df.columns:
-            st.dataframe(df[["Pattern", "Context"]].tail(5), use_container_width=True)
+        if patterns_df is not None:
+            st.dataframe(patterns_df, use_container_width=True)
         else:
             st.warning("🛑 Columns 'Pattern' or 'Context' missing in CSV")
 
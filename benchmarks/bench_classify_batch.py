@@ -0,0 +1,75 @@
+# Throughput of LoopDetector.classify_batch vs one classify_loop call per
+# row, after checking that both give the same label for every row.
+#
+#   python benchmarks/bench_classify_batch.py [rows]
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.loop_detector import BATCH_COLUMNS, LoopDetector
+
+
+def make_table(rows, seed=0):
+    # Random flags with every rule firing now and then, plus the odd missing
+    # value: NaN is truthy in classify_loop, None is not
+    rng = np.random.default_rng(seed)
+    table = pd.DataFrame({
+        "scroll_detected": rng.random(rows) < 0.05,
+        "face_detected": rng.random(rows) < 0.9,
+        "eyes_detected": rng.random(rows) < 0.9,
+        "blink_detected": rng.random(rows) < 0.1,
+        "smile_detected": rng.random(rows) < 0.1,
+        "duration_sec": rng.uniform(0, 240, rows)
+    })
+    table["duration_sec"] = table["duration_sec"].mask(rng.random(rows) < 0.01)
+    table["smile_detected"] = table["smile_detected"].astype(object).mask(rng.random(rows) < 0.01, None)
+    table["eyes_detected"] = table["eyes_detected"].astype(float).mask(rng.random(rows) < 0.01)
+    return table
+
+
+def classify_rows(detector, table):
+    labels = []
+    for row in table.to_dict("records"):
+        labels.append(detector.classify_loop(row, row["duration_sec"]))
+    return labels
+
+
+def main(rows=1_000_000):
+    detector = LoopDetector()
+    table = make_table(rows)
+
+    started = time.perf_counter()
+    batch = detector.classify_batch(table)
+    batch_sec = time.perf_counter() - started
+
+    started = time.perf_counter()
+    per_row = classify_rows(detector, table)
+    row_sec = time.perf_counter() - started
+
+    mismatches = int((batch != np.array(per_row)).sum())
+    if mismatches:
+        raise SystemExit(f"❌ classify_batch differs from classify_loop on {mismatches} rows")
+
+    # Same table as a 2-D float array in BATCH_COLUMNS order (None becomes NaN)
+    plain = table[BATCH_COLUMNS].astype(float).to_numpy()
+    started = time.perf_counter()
+    array_labels = detector.classify_batch(plain)
+    array_sec = time.perf_counter() - started
+    sample = plain[:100_000]
+    expected = [detector.classify_loop(dict(zip(BATCH_COLUMNS, row)), row[-1]) for row in sample]
+    if (array_labels[:len(sample)] != np.array(expected)).any():
+        raise SystemExit("❌ classify_batch differs from classify_loop on the plain array")
+
+    print(f"{rows} rows, labels identical to classify_loop")
+    print(f"{'classify_loop per row':<26} {row_sec:>8.3f} s {rows / row_sec:>14,.0f} rows/s")
+    print(f"{'classify_batch (pandas)':<26} {batch_sec:>8.3f} s {rows / batch_sec:>14,.0f} rows/s")
+    print(f"{'classify_batch (ndarray)':<26} {array_sec:>8.3f} s {rows / array_sec:>14,.0f} rows/s")
+    print(pd.Series(batch).value_counts().to_string())
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
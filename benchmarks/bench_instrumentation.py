@@ -0,0 +1,30 @@
+# Cost of one stage span (start/stop pair) of src/instrumentation.py with
+# the timer disabled and enabled, next to an empty loop body.
+#
+#   python benchmarks/bench_instrumentation.py
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.instrumentation import StageTimer
+
+
+def main(spans=200000):
+    def empty():
+        pass
+
+    def timed(timer):
+        def span():
+            started = timer.start()
+            timer.stop("face_mesh", started)
+        return span
+
+    for name, fn in (("empty", empty), ("disabled", timed(StageTimer(enabled=False))),
+                     ("enabled", timed(StageTimer(enabled=True)))):
+        ns = min(timeit.repeat(fn, number=spans, repeat=3)) / spans * 1e9
+        print(f"{name:<10} {ns:>8.0f} ns/span")
+
+
+if __name__ == "__main__":
+    main()
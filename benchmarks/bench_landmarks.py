@@ -0,0 +1,68 @@
+# Per-frame cost of reading FaceMesh landmarks: attribute-by-attribute access
+# (the old tracker code) vs gather_landmarks + face_features in
+# src/landmarks.py, next to converting the whole mesh to an array.
+#
+#   python benchmarks/bench_landmarks.py
+import os
+import random
+import sys
+import timeit
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.landmarks import face_features, gather_landmarks, landmarks_to_array
+
+NUM_LANDMARKS = 478
+
+
+def make_face():
+    rng = random.Random(0)
+    try:
+        from mediapipe.framework.formats import landmark_pb2
+        face = landmark_pb2.NormalizedLandmarkList()
+        for _ in range(NUM_LANDMARKS):
+            face.landmark.add(x=rng.random(), y=rng.random(), z=rng.random())
+        return face, "protobuf NormalizedLandmarkList"
+    except ImportError:
+        class Landmark:
+            __slots__ = ("x", "y", "z")
+
+            def __init__(self, x, y, z):
+                self.x, self.y, self.z = x, y, z
+
+        class Face:
+            def __init__(self):
+                self.landmark = [Landmark(rng.random(), rng.random(), rng.random()) for _ in range(NUM_LANDMARKS)]
+
+        return Face(), "plain Python objects (mediapipe protobufs not available)"
+
+
+def per_attribute(face, w=640, h=480):
+    right_iris = face.landmark[468]
+    left_iris = face.landmark[473]
+    right_center = (int(right_iris.x * w), int(right_iris.y * h))
+    left_center = (int(left_iris.x * w), int(left_iris.y * h))
+    lip_distance = abs(face.landmark[13].y - face.landmark[14].y)
+    eye_distance = abs(face.landmark[159].y - face.landmark[145].y)
+    return right_center, left_center, lip_distance, eye_distance
+
+
+def gathered(face, w=640, h=480):
+    iris, lip_gap, eye_openness = face_features(gather_landmarks(face))
+    right_x, right_y, left_x, left_y = iris
+    return (int(right_x * w), int(right_y * h)), (int(left_x * w), int(left_y * h)), lip_gap, eye_openness
+
+
+def full_array(face):
+    return landmarks_to_array(face)
+
+
+def main(number=20000):
+    face, kind = make_face()
+    print(f"Landmarks: {kind}")
+    for name, fn in [("per-attribute access", per_attribute), ("gather + features", gathered), ("full (478, 3) array", full_array)]:
+        seconds = min(timeit.repeat(lambda: fn(face), number=number, repeat=5))
+        print(f"{name:<22} {seconds / number * 1e6:8.2f} µs/frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# Latency of one log_pattern call as the log grows: the append path in
+# src/pattern_logger.py (with and without the dashboard rollup update) vs the
+# old read_csv + concat + to_csv rewrite.
+#
+#   python benchmarks/bench_log_append.py
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.pattern_logger import append_rows, build_row
+
+SIZES = [0, 1000, 10000, 50000]
+SAMPLES = 50
+
+
+def rewrite_log(file_path, row):
+    # The previous implementation, kept here for comparison
+    if os.path.exists(file_path):
+        df = pd.read_csv(file_path)
+        df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
+    else:
+        df = pd.DataFrame([row])
+    df.to_csv(file_path, index=False)
+
+
+def time_appends(write, file_path, row):
+    timings = []
+    for _ in range(SAMPLES):
+        started = time.perf_counter()
+        write(file_path, row)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main():
+    row = build_row("DetectedGazePattern", "Normal", 75, "Reading", "No")
+    print(f"{'rows in log':>12} {'append (ms)':>12} {'+rollups (ms)':>14} {'rewrite (ms)':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in SIZES:
+            paths = {}
+            for name in ("append", "rollups", "rewrite"):
+                paths[name] = os.path.join(tmp, f"{name}_{size}.csv")
+                if size:
+                    append_rows(paths[name], [row] * size, update_rollups=False)
+            append_ms = time_appends(lambda path, r: append_rows(path, [r], update_rollups=False), paths["append"], row)
+            rollups_ms = time_appends(lambda path, r: append_rows(path, [r]), paths["rollups"], row)
+            rewrite_ms = time_appends(rewrite_log, paths["rewrite"], row)
+            print(f"{size:>12} {append_ms:>12.3f} {rollups_ms:>14.3f} {rewrite_ms:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# Per-call cost of the trained loop classifier: sklearn's predict on one row
+# vs the compiled tree from models/loop_classifier.npz (see src/loop_model.py),
+# after checking both give the same labels.
+#
+#   python mirrormind.py train-model   # needs session features from live sessions
+#   python benchmarks/bench_loop_model.py
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.loop_model import COMPILED_PATH, MODEL_PATH, CompiledTree, LoopClassifier, build_training_set
+
+
+def per_call_us(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    import joblib
+
+    model = joblib.load(MODEL_PATH)["model"]
+    tree = CompiledTree.load(COMPILED_PATH)
+    X, _, _ = build_training_set(["data/loop_log_dataset.csv"])
+
+    expected = model.predict(X)
+    if not (tree.predict_batch(X) == expected).all() \
+            or any(tree.predict_row(row) != label for row, label in zip(X.tolist(), expected)):
+        raise SystemExit("❌ Compiled tree differs from sklearn predict")
+    print(f"{len(X)} rows, compiled tree labels identical to sklearn predict")
+
+    row = X[:1]
+    row_list = X[0].tolist()
+    classifier = LoopClassifier()
+    gaze_info = {"face_detected": True, "eyes_detected": True, "blink_detected": False, "smile_detected": False}
+    classifier.load()
+    big = np.repeat(X, 100, axis=0)
+
+    print(f"{'sklearn predict, 1 row':<32} {per_call_us(lambda: model.predict(row), 200):>10.2f} us")
+    print(f"{'CompiledTree.predict_row':<32} {per_call_us(lambda: tree.predict_row(row_list), 20000):>10.2f} us")
+    print(f"{'LoopClassifier.predict':<32} {per_call_us(lambda: classifier.predict(gaze_info, 90.0, 'Reading'), 20000):>10.2f} us")
+    print(f"{f'sklearn predict, {len(big)} rows':<32} {per_call_us(lambda: model.predict(big), 5) / 1000:>10.2f} ms")
+    print(f"{f'CompiledTree.predict_batch':<32} {per_call_us(lambda: tree.predict_batch(big), 5) / 1000:>10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
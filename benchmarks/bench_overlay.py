@@ -0,0 +1,63 @@
+# Per-frame cost of the live overlay: drawing the glow circles and five
+# putText lines directly (the old tracker code) vs the cached sprites and
+# text patches of src/overlay_renderer.py.
+#
+#   python benchmarks/bench_overlay.py
+import os
+import sys
+import timeit
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.overlay_renderer import OverlayRenderer
+
+EYES = ((300, 200), (360, 202))
+
+
+def draw_robo_eye(frame, center, color=(255, 0, 0)):
+    x, y = center
+    glow_layers = 4
+    base_radius = 8
+    for i in range(glow_layers):
+        radius = base_radius + i * 4
+        opacity = 1 - i / glow_layers
+        glow_color = tuple(int(c * opacity) for c in color)
+        cv2.circle(frame, (x, y), radius, glow_color, 1)
+    cv2.circle(frame, (x, y), 4, (255, 255, 255), -1)
+
+
+def put_overlay_text(frame, loop_type, duration, break_suggested, pattern, context):
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    cv2.putText(frame, f"LoopType: {loop_type}", (10, 30), font, 0.7, (0, 255, 255), 2)
+    cv2.putText(frame, f"Duration: {duration}s", (10, 60), font, 0.7, (255, 255, 255), 2)
+    cv2.putText(frame, f"Break: {break_suggested}", (10, 90), font, 0.7, (0, 0, 255) if break_suggested == "Yes" else (0, 255, 0), 2)
+    cv2.putText(frame, f"Pattern: {pattern}", (10, 120), font, 0.7, (255, 255, 0), 2)
+    cv2.putText(frame, f"Context: {context}", (10, 150), font, 0.7, (255, 128, 0), 2)
+
+
+def main(frames=3000, fps=30):
+    base = np.random.default_rng(0).integers(0, 255, (480, 640, 3), dtype=np.uint8)
+    frame = base.copy()
+    renderer = OverlayRenderer()
+
+    def direct(i=[0]):
+        i[0] += 1
+        for center in EYES:
+            draw_robo_eye(frame, center)
+        put_overlay_text(frame, "FreezeLoop", i[0] // fps, "Yes", "DetectedGazePattern", "Reading")
+
+    def cached(i=[0]):
+        i[0] += 1
+        renderer.render(frame, EYES, "FreezeLoop", i[0] // fps, "Yes", "DetectedGazePattern", "Reading")
+
+    direct_us = min(timeit.repeat(direct, number=frames, repeat=3)) / frames * 1e6
+    cached_us = min(timeit.repeat(cached, number=frames, repeat=3)) / frames * 1e6
+    print(f"{'direct circles + putText':<26} {direct_us:>8.1f} us/frame")
+    print(f"{'OverlayRenderer':<26} {cached_us:>8.1f} us/frame "
+          f"({renderer.text_renders} text rasterizations in {3 * frames} frames, duration ticks at {fps} fps)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import argparse
+import csv
+import sys
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
+def run_analyze(args):
+    from src.batch_analyzer import analyze_video
+
+    try:
+        report = analyze_video(args.video, workers=args.workers, stride=args.stride, window_sec=args.window)
+    except FileNotFoundError as e:
+        raise SystemExit(f"❌ {e}")
+    print(f"🎞️ {report['video']}: {report['video_sec']:.0f}s of video, {report['frames_analyzed']} frames analyzed")
+    print(f"⚡ {report['elapsed_sec']:.1f}s elapsed ({report['speedup']:.1f}x real time)")
+    for episode in report["episodes"]:
+        print(f"  {episode['start']:>8.0f}s – {episode['end']:>8.0f}s  {episode['loop_type']:<16} {episode['context']}")
+
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["start", "end", "duration", "loop_type", "context"])
+            writer.writeheader()
+            writer.writerows(report["episodes"])
+        print(f"✅ Timeline written to {args.output}")
+
+
+def run_import_log(args):
+    from src.log_rollups import LogRollups, rollup_path
+    from src.utils import is_parquet_path
+
+    if is_parquet_path(args.destination):
+        from src.parquet_log_store import ParquetLogStore
+        imported = ParquetLogStore(args.destination).import_csv(args.csv)
+    else:
+        from src.sqlite_log_store import SQLiteLogStore
+        store = SQLiteLogStore(args.destination)
+        imported = store.import_csv(args.csv)
+        store.close()
+    # Bulk imports bypass the logging path, so recompute the dashboard rollups
+    rollups = LogRollups(rollup_path(args.destination))
+    rollups.rebuild(args.destination)
+    rollups.close()
+    print(f"✅ Imported {imported} rows from {args.csv} into {args.destination} (rollups rebuilt)")
+
+
+def run_compact_log(args):
+    from src.parquet_log_store import ParquetLogStore
+
+    merged = ParquetLogStore(args.store, compact_min_files=args.min_files).compact()
+    print(f"✅ Compacted {merged} files in {args.store}")
+
+
+def run_normalize_log(args):
+    from src.log_normalizer import normalize_logs
+
+    rows = normalize_logs(args.inputs, args.output, chunksize=args.chunksize)
+    print(f"✅ Wrote {rows} clean rows to {args.output}")
+
+
+def run_rebuild_rollups(args):
+    from src.log_rollups import LogRollups, rollup_path
+
+    rollups = LogRollups(rollup_path(args.log))
+    rollups.rebuild(args.log)
+    rollups.close()
+    print(f"✅ Rebuilt {rollup_path(args.log)} from {args.log}")
+
+
+def run_train_model(args):
+    from src.loop_model import train_model
+
+    try:
+        artifact = train_model(args.logs, args.sessions, output_path=args.output, max_depth=args.max_depth)
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}")
+    metrics = artifact["metrics"]
+    print(f"🤖 Trained on {metrics['rows']} rows with gaze flags ({metrics['skipped_rows']} skipped), "
+          f"depth {metrics['depth']}, holdout accuracy {metrics['holdout_accuracy']:.1%}")
+    print(f"✅ Model {artifact['version']} written to {args.output} (+ compiled .npz)")
+
+
+def run_export_model(args):
+    import joblib
+    from src.loop_model import compiled_path, export_model
+
+    output = args.output or compiled_path(args.model)
+    artifact = joblib.load(args.model)
+    export_model(artifact, output)
+    print(f"✅ Model {artifact['version']} exported to {output}, matches predict")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="mirrormind", description="MirrorMind command line tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    analyze = commands.add_parser("analyze", help="Label a recorded video with loop episodes")
+    analyze.add_argument("video")
+    analyze.add_argument("--workers", type=positive_int, default=None, help="Worker processes (default: all cores)")
+    analyze.add_argument("--stride", type=positive_int, default=1, help="Analyze every Nth frame")
+    analyze.add_argument("--window", type=float, default=10.0, help="Classification window in seconds")
+    analyze.add_argument("--output", help="Write the episode timeline to this CSV file")
+    analyze.set_defaults(func=run_analyze)
+
+    import_log = commands.add_parser("import-log", help="Load a CSV loop log into the SQLite or Parquet log backend")
+    import_log.add_argument("csv", nargs="?", default="data/loop_log_dataset.csv")
+    import_log.add_argument("destination", nargs="?", default="data/loop_log.db",
+                            help="*.db for SQLite, a *.parquet directory for the Parquet store")
+    import_log.set_defaults(func=run_import_log)
+
+    compact_log = commands.add_parser("compact-log", help="Merge small files in a Parquet log store")
+    compact_log.add_argument("store", nargs="?", default="data/loop_log.parquet")
+    compact_log.add_argument("--min-files", type=int, default=8, help="Only compact days with at least this many files")
+    compact_log.set_defaults(func=run_compact_log)
+
+    normalize_log = commands.add_parser("normalize-log", help="Write a clean, typed copy of legacy loop logs")
+    normalize_log.add_argument("inputs", nargs="*",
+                               default=["data/loop_log_dataset.csv", "data/MirrorMind_LoopBehaviorDataset.csv"])
+    normalize_log.add_argument("--output", default="data/loop_log_clean.parquet", help="*.parquet or *.csv")
+    normalize_log.add_argument("--chunksize", type=int, default=100000)
+    normalize_log.set_defaults(func=run_normalize_log)
+
+    rebuild_rollups = commands.add_parser("rebuild-rollups", help="Recompute the dashboard rollups of a log")
+    rebuild_rollups.add_argument("log", nargs="?", default="data/loop_log_dataset.csv")
+    rebuild_rollups.set_defaults(func=run_rebuild_rollups)
+
+    train = commands.add_parser("train-model", help="Train the loop classifier from the log and session features")
+    train.add_argument("logs", nargs="*", default=["data/loop_log_dataset.csv"],
+                       help="Raw CSV logs or normalize-log .parquet output (rows without gaze flags are skipped)")
+    train.add_argument("--sessions", nargs="*", default=["data/session_features.csv"],
+                       help="Per-session feature files written by the dashboard (skipped if missing)")
+    train.add_argument("--output", default="models/loop_classifier.pkl")
+    train.add_argument("--max-depth", type=int, default=12)
+    train.set_defaults(func=run_train_model)
+
+    export = commands.add_parser("export-model", help="Flatten a trained model into NumPy arrays for sklearn-free use")
+    export.add_argument("model", nargs="?", default="models/loop_classifier.pkl")
+    export.add_argument("--output", help="Default: the model path with .npz")
+    export.set_defaults(func=run_export_model)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
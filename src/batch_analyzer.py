@@ -0,0 +1,161 @@
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.context_estimator import guess_context
+from src.face_gaze_tracker import FaceGazeTracker
+from src.frame_sources import VideoFileSource
+from src.loop_detector import LoopDetector
+
+# Columns of the per-frame feature table produced by each worker
+FRAME_COLUMNS = ["t", "face", "eyes", "smile", "eye_closed", "rx", "ry", "lx", "ly"]
+
+_worker_tracker = None
+
+
+def _init_worker():
+    # One FaceMesh per worker process, reused for every segment it handles.
+    # No adaptive stride: it picks keyframes from wall-clock mesh time, which
+    # depends on pool load and would make labels differ between runs; the
+    # user sets the stride with --stride instead.
+    global _worker_tracker
+    _worker_tracker = FaceGazeTracker(use_adaptive_stride=False)
+
+
+def split_segments(frame_count, num_segments):
+    bounds = np.linspace(0, frame_count, num_segments + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def analyze_segment(path, start, end, stride=1):
+    source = VideoFileSource(path, start_frame=start)
+    _worker_tracker.reset_tracking()
+    rows = []
+    try:
+        while source.frame_index < end:
+            t = source.media_time
+            if (source.frame_index - start) % stride:
+                if not source.skip():
+                    break
+                continue
+            ret, frame = source.read()
+            if not ret:
+                break
+            features = _worker_tracker.analyze_frame(frame, t)
+            eye_closed = features["eye_closed"]
+            gaze = features["gaze"] or ((np.nan, np.nan), (np.nan, np.nan))
+            rows.append((
+                t,
+                features["face_detected"],
+                features["eyes_detected"],
+                features["smile_detected"],
+                np.nan if eye_closed is None else eye_closed,
+                gaze[0][0], gaze[0][1], gaze[1][0], gaze[1][1]
+            ))
+    finally:
+        source.release()
+    return np.array(rows, dtype=np.float32).reshape(-1, len(FRAME_COLUMNS))
+
+
+def _analyze_segment_task(args):
+    return analyze_segment(*args)
+
+
+def _count_blinks(eye_closed):
+    # Same rule as the live loop: a blink is counted when the eye re-opens,
+    # frames without eye landmarks don't change the state.
+    known = eye_closed[~np.isnan(eye_closed)]
+    if known.size == 0:
+        return 0
+    is_open = np.concatenate([[1.0], 1.0 - known])  # Assume eyes open
+    return int(np.sum((is_open[1:] == 1) & (is_open[:-1] == 0)))
+
+
+def _window_gaze_info(frames):
+    # Majority vote over the window for the per-frame flags
+    face_detected = bool(frames[:, 1].mean() >= 0.5)
+    blink_count = _count_blinks(frames[:, 4])
+    gaze_data = frames[~np.isnan(frames[:, 5]), 5:9]
+    return {
+        "face_detected": face_detected,
+        "eyes_detected": bool(frames[:, 2].mean() >= 0.5),
+        "blink_detected": blink_count > 3,
+        "smile_detected": bool(frames[:, 3].mean() >= 0.5),
+        "context": guess_context(gaze_data, blink_count, face_detected)
+    }
+
+
+def build_timeline(frames, window_sec=10.0):
+    # Classify fixed windows with LoopDetector and merge equal neighbours into episodes
+    detector = LoopDetector()
+    episodes = []
+    if len(frames) == 0:
+        return episodes
+
+    window_ids = (frames[:, 0] // window_sec).astype(int)
+    boundaries = np.flatnonzero(np.diff(window_ids)) + 1
+    for chunk in np.split(frames, boundaries):
+        start = float(chunk[0, 0] // window_sec * window_sec)
+        end = start + window_sec
+        gaze_info = _window_gaze_info(chunk)
+
+        # Time spent in a plain stretch counts towards the >2 min ConsumptionLoop rule
+        current = episodes[-1] if episodes else None
+        if current and current["end"] == start and current["loop_type"] in ("Normal", "ConsumptionLoop"):
+            duration = end - current["start"]
+        else:
+            duration = end - start
+        loop_type = detector.classify_loop(gaze_info, duration)
+
+        if current and current["end"] == start and current["loop_type"] == loop_type:
+            current["end"] = end
+            current["contexts"][gaze_info["context"]] += 1
+        elif current and current["end"] == start and loop_type == "ConsumptionLoop" and current["loop_type"] == "Normal":
+            # The stretch has crossed the threshold, so the whole stretch is one episode
+            current["loop_type"] = loop_type
+            current["end"] = end
+            current["contexts"][gaze_info["context"]] += 1
+        else:
+            episodes.append({
+                "start": start,
+                "end": end,
+                "loop_type": loop_type,
+                "contexts": Counter([gaze_info["context"]])
+            })
+
+    for episode in episodes:
+        episode["context"] = episode.pop("contexts").most_common(1)[0][0]
+        episode["duration"] = episode["end"] - episode["start"]
+    return episodes
+
+
+def analyze_video(path, workers=None, stride=1, window_sec=10.0, segments_per_worker=2):
+    if stride < 1:
+        raise ValueError(f"stride must be at least 1, got {stride}")
+    probe = VideoFileSource(path)
+    frame_count, fps = probe.frame_count, probe.fps
+    probe.release()
+
+    workers = workers or os.cpu_count() or 1
+    segments = split_segments(frame_count, workers * segments_per_worker)
+    tasks = [(path, start, end, stride) for start, end in segments]
+
+    started = time.time()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        # map keeps segment order, so the frame tables concatenate in time order
+        parts = list(pool.map(_analyze_segment_task, tasks))
+    elapsed = time.time() - started
+
+    frames = np.concatenate(parts) if parts else np.empty((0, len(FRAME_COLUMNS)), dtype=np.float32)
+    video_sec = frame_count / fps
+    return {
+        "video": path,
+        "frames_analyzed": len(frames),
+        "video_sec": video_sec,
+        "elapsed_sec": elapsed,
+        "speedup": video_sec / elapsed if elapsed else 0.0,
+        "episodes": build_timeline(frames, window_sec)
+    }
@@ -0,0 +1,105 @@
+import threading
+import time
+
+
+class LatestFrameGrabber:
+    # Reads frames on a background thread and keeps only the newest one, so a
+    # slow inference loop never works through a backlog of stale frames.
+    def __init__(self, cap):
+        self.cap = cap
+        self._cond = threading.Condition()
+        self._frame = None
+        self._frame_time = 0.0
+        self._frame_id = 0
+        self._consumed_id = 0
+        self._running = False
+        self._thread = None
+        self.finished = False
+        self.captured_frames = 0
+        self.dropped_frames = 0
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._capture_loop, name="mirrormind-capture", daemon=True)
+        self._thread.start()
+        return self
+
+    def _capture_loop(self):
+        while self._running:
+            ret, frame = self.cap.read()
+            captured_at = time.monotonic()
+            with self._cond:
+                if not ret:
+                    self.finished = True
+                    self._cond.notify_all()
+                    return
+                if self._frame_id > self._consumed_id:
+                    self.dropped_frames += 1  # Previous frame was never picked up
+                self._frame = frame
+                self._frame_time = captured_at
+                self._frame_id += 1
+                self.captured_frames += 1
+                self._cond.notify_all()
+
+    def read(self, timeout=1.0):
+        # Returns (ok, frame, captured_at); blocks until a frame newer than the
+        # last one handed out is available. ok is False both at the end of the
+        # stream and when no frame arrived within timeout (e.g. while a webcam
+        # warms up); finished tells the two apart.
+        with self._cond:
+            self._cond.wait_for(lambda: self._frame_id > self._consumed_id or self.finished, timeout)
+            if self._frame_id == self._consumed_id:
+                return False, None, None
+            self._consumed_id = self._frame_id
+            return True, self._frame, self._frame_time
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        self.cap.release()
+
+
+class LatencyStats:
+    # Capture-to-result latency, in milliseconds
+    def __init__(self, smoothing=0.1):
+        self.smoothing = smoothing
+        self.count = 0
+        self.last_ms = 0.0
+        self.avg_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, captured_at):
+        latency_ms = (time.monotonic() - captured_at) * 1000
+        self.count += 1
+        self.last_ms = latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+        if self.count == 1:
+            self.avg_ms = latency_ms
+        else:
+            self.avg_ms += self.smoothing * (latency_ms - self.avg_ms)
+        return latency_ms
+
+
+class DirectFrameReader:
+    # Same interface as LatestFrameGrabber for sources that must not drop
+    # frames (files, folders, generators): frames are read on demand.
+    def __init__(self, cap):
+        self.cap = cap
+        self.finished = False
+        self.captured_frames = 0
+        self.dropped_frames = 0
+
+    def start(self):
+        return self
+
+    def read(self, timeout=None):
+        ret, frame = self.cap.read()
+        if not ret:
+            self.finished = True
+            return False, None, None
+        self.captured_frames += 1
+        return True, frame, time.monotonic()
+
+    def stop(self):
+        self.cap.release()
@@ -0,0 +1,121 @@
+import math
+from collections import deque
+
+import numpy as np
+
+# Average iris movement per gaze sample, in pixels
+READING_MAX_MOVEMENT = 5
+WRITING_MAX_MOVEMENT = 20
+
+
+def _label(avg_movement, blink_count, face_detected, num_points):
+    if not face_detected:
+        return "Escape/Idle"
+    if blink_count > 5:
+        return "Writing/Thinking"
+    if num_points < 2:
+        return "Unknown"
+    if avg_movement < READING_MAX_MOVEMENT:
+        return "Reading"
+    elif avg_movement < WRITING_MAX_MOVEMENT:
+        return "Writing"
+    else:
+        return "Browsing"
+
+
+def _step_lengths(points):
+    steps = np.diff(np.asarray(points, dtype=np.float64), axis=0)
+    return np.hypot(steps[:, 0], steps[:, 1]) + np.hypot(steps[:, 2], steps[:, 3])
+
+
+def guess_context(points, blink_count, face_detected):
+    # Context for one window of gaze points, an (n, 4) array of right/left
+    # iris centers in pixels
+    num_points = len(points)
+    if num_points < 2:
+        return _label(0.0, blink_count, face_detected, num_points)
+    return _label(_step_lengths(points).sum() / num_points, blink_count, face_detected, num_points)
+
+
+def estimate_context_batch(points, blink_counts, face_detected, window=None):
+    # Vectorized equivalent of feeding every row to ContextEstimator.update and
+    # reading context() after each one. blink_counts and face_detected are
+    # per-row arrays (or scalars).
+    num_rows = len(points)
+    cumulative = np.zeros(num_rows)
+    if num_rows > 1:
+        cumulative[1:] = np.cumsum(_step_lengths(points))
+
+    index = np.arange(num_rows)
+    if window:
+        first = np.maximum(index - window + 1, 0)
+        num_points = index - first + 1
+        movement = cumulative - cumulative[first]
+    else:
+        num_points = index + 1
+        movement = cumulative
+    avg_movement = movement / np.maximum(num_points, 1)
+
+    blink_counts = np.broadcast_to(blink_counts, num_rows)
+    face_detected = np.broadcast_to(face_detected, num_rows).astype(bool)
+    return np.select(
+        [
+            ~face_detected,
+            blink_counts > 5,
+            num_points < 2,
+            avg_movement < READING_MAX_MOVEMENT,
+            avg_movement < WRITING_MAX_MOVEMENT
+        ],
+        ["Escape/Idle", "Writing/Thinking", "Unknown", "Reading", "Writing"],
+        default="Browsing"
+    )
+
+
+class ContextEstimator:
+    # Streaming version of guess_context: keeps a running movement sum so each
+    # gaze sample costs O(1). Use either a sliding window (in samples) or an
+    # exponential decay factor, or neither to cover the whole session.
+    def __init__(self, window=None, decay=None):
+        if window and decay:
+            raise ValueError("Use either a sliding window or exponential decay, not both")
+        if window is not None and window < 2:
+            raise ValueError("Window must hold at least two gaze samples")
+        self.window = window
+        self.decay = decay
+        self.reset()
+
+    def reset(self):
+        self._steps = deque()
+        self._movement = 0.0
+        self._weight = 0.0
+        self._num_points = 0
+        self._prev = None
+        self._updates_since_resum = 0
+
+    def update(self, right_x, right_y, left_x, left_y):
+        if self._prev is not None:
+            px, py, qx, qy = self._prev
+            step = math.hypot(right_x - px, right_y - py) + math.hypot(left_x - qx, left_y - qy)
+            if self.decay:
+                self._movement = self._movement * (1 - self.decay) + step
+            else:
+                self._movement += step
+            if self.window:
+                self._steps.append(step)
+                if len(self._steps) >= self.window:
+                    self._movement -= self._steps.popleft()
+                self._updates_since_resum += 1
+                if self._updates_since_resum >= self.window:
+                    # Re-sum now and then so float error can't build up
+                    self._movement = math.fsum(self._steps)
+                    self._updates_since_resum = 0
+        self._prev = (right_x, right_y, left_x, left_y)
+
+        self._num_points += 1
+        if self.window:
+            self._num_points = min(self._num_points, self.window)
+        self._weight = self._weight * (1 - self.decay) + 1 if self.decay else self._num_points
+
+    def context(self, blink_count, face_detected):
+        avg_movement = self._movement / self._weight if self._weight else 0.0
+        return _label(avg_movement, blink_count, face_detected, self._num_points)
@@ -0,0 +1,154 @@
+import sys
+import threading
+import time
+
+import cv2
+
+WINDOW_NAME = "🧠 MirrorMind Live"
+# macOS HighGUI only works on the main thread, so the window is driven
+# from the analysis loop there
+HIGHGUI_NEEDS_MAIN_THREAD = sys.platform == "darwin"
+
+
+class LiveDisplay:
+    # Draws and shows the live overlay on its own thread, at most max_fps
+    # times per second. The analysis loop hands over each annotated frame
+    # with submit(), which only swaps a reference; the display picks up the
+    # newest one when it is due and silently skips the rest, so a slow
+    # window never holds up detection. Nothing is drawn while the window is
+    # hidden (minimized or not visible), or when running headless and the
+    # preview publisher is not due. All HighGUI calls (imshow, waitKey,
+    # destroyWindow) stay on one thread; pressing 'q' in the window or
+    # closing (destroying) it sets quit_requested. With threaded=False, or
+    # by default when showing a window on macOS, there is no display thread
+    # and submit() draws on the caller's thread whenever a frame is due.
+    # With a StageTimer, overlay drawing and imshow are recorded as the
+    # "overlay" and "imshow" stages.
+    def __init__(self, renderer, max_fps=15.0, show_window=True, preview=None, window_name=WINDOW_NAME,
+                 timer=None, threaded=None):
+        self.renderer = renderer
+        self.min_interval = 1.0 / max_fps
+        self.show_window = show_window
+        self.preview = preview
+        self.window_name = window_name
+        self.timer = timer
+        self.threaded = not (show_window and HIGHGUI_NEEDS_MAIN_THREAD) if threaded is None else threaded
+        self.quit_requested = threading.Event()
+        self.submitted_frames = 0
+        self.rendered_frames = 0
+        self._cond = threading.Condition()
+        self._latest = None
+        self._running = False
+        self._thread = None
+        self._window_open = False
+        self._next_due = 0.0
+
+    def start(self):
+        self._running = True
+        if self.threaded:
+            self._thread = threading.Thread(target=self._run, name="mirrormind-display", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        elif not self.threaded:
+            self._close_window()
+
+    def submit(self, frame, overlay):
+        # overlay: the OverlayRenderer.render arguments after the frame. The
+        # caller must not draw on the frame afterwards.
+        if not self.threaded:
+            self.submitted_frames += 1
+            now = time.monotonic()
+            if now >= self._next_due:
+                self._next_due = now + self.min_interval
+                self._show(frame, overlay)
+            else:
+                self._poll_keys()
+            return
+        with self._cond:
+            self._latest = (frame, overlay)
+            self.submitted_frames += 1
+            self._cond.notify_all()
+
+    @property
+    def skipped_frames(self):
+        return self.submitted_frames - self.rendered_frames
+
+    def _window_state(self):
+        # "visible", "hidden" (e.g. minimized) or "destroyed" (closed by the
+        # user); imshow would silently reopen a destroyed window
+        if not self._window_open:
+            return "visible"
+        try:
+            if cv2.getWindowProperty(self.window_name, cv2.WND_PROP_AUTOSIZE) < 0:
+                return "destroyed"
+            visible = cv2.getWindowProperty(self.window_name, cv2.WND_PROP_VISIBLE) >= 1
+        except cv2.error:
+            return "destroyed"
+        return "visible" if visible else "hidden"
+
+    def _run(self):
+        next_due = 0.0
+        try:
+            while True:
+                with self._cond:
+                    if not self._running:
+                        return
+                    now = time.monotonic()
+                    item = None
+                    if self._latest is not None and now >= next_due:
+                        item, self._latest = self._latest, None
+                    else:
+                        self._cond.wait(self.min_interval if self._latest is None else next_due - now)
+                if item is None:
+                    self._poll_keys()
+                    continue
+                next_due = now + self.min_interval
+                self._show(*item)
+        finally:
+            self._close_window()
+
+    def _close_window(self):
+        if self._window_open:
+            self._window_open = False
+            try:
+                cv2.destroyWindow(self.window_name)
+            except cv2.error:
+                pass  # Already destroyed by the user
+            cv2.waitKey(1)
+
+    def _show(self, frame, overlay):
+        to_window = False
+        if self.show_window:
+            state = self._window_state()
+            if state == "destroyed":
+                self._window_open = False
+                self.quit_requested.set()
+                return
+            to_window = state == "visible"
+        to_preview = self.preview is not None and self.preview.due()
+        if to_window or to_preview:
+            overlay_ms = self.renderer.render(frame, *overlay)
+            self.rendered_frames += 1
+            if self.timer is not None:
+                self.timer.record("overlay", overlay_ms)
+        if to_preview:
+            self.preview.publish(frame)
+        if to_window:
+            started = self.timer.start() if self.timer is not None else 0
+            cv2.imshow(self.window_name, frame)
+            if started:
+                self.timer.stop("imshow", started)
+            self._window_open = True
+        self._poll_keys()
+
+    def _poll_keys(self):
+        if self.show_window and self._window_open and cv2.waitKey(1) & 0xFF == ord("q"):
+            self.quit_requested.set()
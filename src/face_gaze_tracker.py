@@ -3,8 +3,24 @@ import mediapipe as mp
 import time
 import numpy as np
 
+from src.capture import DirectFrameReader, LatestFrameGrabber, LatencyStats
+from src.context_estimator import ContextEstimator
+from src.display import LiveDisplay
+from src.frame_sources import WebcamSource
+from src.gaze_buffer import GazeRingBuffer
+from src.inference_scheduler import AdaptiveStride
+from src.instrumentation import StageTimer
+from src.landmarks import EYE_CLOSED_OPENNESS, SMILE_LIP_GAP, face_features, gather_landmarks
+from src.loop_detector import StreamingLoopDetector
+from src.motion_gate import MotionGate
+from src.overlay_renderer import OverlayRenderer
+
 class FaceGazeTracker:
-    def __init__(self):
+    def __init__(self, gaze_capacity=9000, gaze_history_path=None, context_decay=None,
+                 use_cascade=True, detect_interval=10, roi_margin=0.25,
+                 use_motion_gate=True, motion_threshold=8, motion_refresh=30,
+                 use_adaptive_stride=True, max_stride=4, cpu_budget_ms=20.0,
+                 instrument=False, stage_overlay=False):
         self.mp_face_mesh = mp.solutions.face_mesh
         self.mp_face_detection = mp.solutions.face_detection
         self.face_mesh = self.mp_face_mesh.FaceMesh(
@@ -16,11 +32,66 @@ class FaceGazeTracker:
         self.face_detector = self.mp_face_detection.FaceDetection(min_detection_confidence=0.6)
         self.mp_drawing = mp.solutions.drawing_utils
         self.final_gaze_info = {}
+        # Recent gaze samples stay in memory; the full history of the latest
+        # session optionally goes to disk (rewritten every session)
+        self.gaze_capacity = gaze_capacity
+        self.gaze_history_path = gaze_history_path
+        # Context covers the buffered gaze window, or an exponentially decayed history
+        self.context_decay = context_decay
+        # Cascade: the cheap face detector decides whether (and where) the mesh
+        # runs, and is re-run every detect_interval frames or when the mesh
+        # loses the face.
+        self.use_cascade = use_cascade
+        self.detect_interval = detect_interval
+        self.roi_margin = roi_margin
+        # Static scenes (e.g. FreezeLoop) reuse the last features instead of
+        # running any model; a refresh is forced every motion_refresh frames.
+        self.motion_gate = MotionGate(motion_threshold, refresh_interval=motion_refresh) if use_motion_gate else None
+        # Between mesh keyframes iris and lip positions are extrapolated
+        self.stride_scheduler = AdaptiveStride(max_stride, cpu_budget_ms) if use_adaptive_stride else None
+        # Eye glow sprite and cached text lines for the live overlay
+        self.overlay = OverlayRenderer()
+        # Per-stage latency histograms and per-second FPS / drop counters,
+        # optionally shown as an extra overlay line
+        self.stage_timer = StageTimer(enabled=instrument or stage_overlay)
+        self.stage_overlay = stage_overlay
+        self.reset_tracking()
+        self.inference_stats = {
+            "analyzed_frames": 0,
+            "detector_runs": 0,
+            "mesh_runs": 0,
+            "motion_skips": 0,
+            "motion_skips_by_loop": {},
+            "stride_skips": 0
+        }
 
-    def stream_gaze_overlay_live(self):
-        cap = cv2.VideoCapture(0)
+    def stream_gaze_overlay_live(self, source=None, stop_event=None, on_update=None, headless=False, preview=None,
+                                 on_episode=None, display_fps=15.0):
+        # Live cameras go through the latest-frame-wins grabber; files, folders
+        # and generators are read frame by frame so nothing is skipped.
+        # The stream ends on 'q', at the end of the source, or once stop_event
+        # is set; on_update receives the current loop state after every frame.
+        # Drawing and display run on a LiveDisplay thread at display_fps,
+        # fed the latest frame and overlay state; headless turns the OpenCV
+        # window off, and an optional PreviewPublisher gets annotated frames
+        # at its own capped rate. Loop episodes are classified as the stream
+        # runs and passed to on_episode as they close.
+        source = source or WebcamSource(0)
+        grabber = (LatestFrameGrabber if source.live else DirectFrameReader)(source).start()
+        latency = LatencyStats()
         start_time = time.time()
-        gaze_data = []
+        gaze_buffer = GazeRingBuffer(self.gaze_capacity, self.gaze_history_path)
+        context_estimator = ContextEstimator(
+            window=None if self.context_decay else self.gaze_capacity,
+            decay=self.context_decay
+        )
+        display = None
+        if not headless or preview is not None:
+            display = LiveDisplay(
+                self.overlay, display_fps, show_window=not headless, preview=preview, timer=self.stage_timer
+            ).start()
+        loop_detector = StreamingLoopDetector(on_episode=on_episode)
+        elapsed = 0.0
         face_detected = False
         eyes_detected = False
         smile_detected = False
@@ -28,120 +99,242 @@ class FaceGazeTracker:
         prev_eye_state = True  # Assume eyes open
         blink_start_time = 0
 
-        while True:
-            ret, frame = cap.read()
+        timer = self.stage_timer
+        timer.reset()
+        while (stop_event is None or not stop_event.is_set()) \
+                and (display is None or not display.quit_requested.is_set()):
+            started = timer.start()
+            ret, frame, captured_at = grabber.read()
             if not ret:
-                break
+                if grabber.finished:
+                    break
+                continue  # Camera stalled, keep waiting unless stopped
+            timer.stop("capture", started)
+            frame_started = timer.start()
 
             h, w, _ = frame.shape
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.face_mesh.process(rgb_frame)
-
-            face_detected = False
-            eyes_detected = False
-            smile_detected = False
-
-            if results.multi_face_landmarks:
-                face_detected = True
-                for face_landmarks in results.multi_face_landmarks:
-                    try:
-                        # Iris detection (eyes)
-                        right_iris = face_landmarks.landmark[468]
-                        left_iris = face_landmarks.landmark[473]
-                        right_center = (int(right_iris.x * w), int(right_iris.y * h))
-                        left_center = (int(left_iris.x * w), int(left_iris.y * h))
-                        eyes_detected = True
-                        gaze_data.append((right_center, left_center))
-
-                        # Smile check
-                        top_lip = face_landmarks.landmark[13]
-                        bottom_lip = face_landmarks.landmark[14]
-                        lip_distance = abs(top_lip.y - bottom_lip.y)
-                        if lip_distance > 0.03:
-                            smile_detected = True
-
-                        # Blink detection (basic)
-                        left_eye_top = face_landmarks.landmark[159]
-                        left_eye_bottom = face_landmarks.landmark[145]
-                        eye_distance = abs(left_eye_top.y - left_eye_bottom.y)
-                        eye_closed = eye_distance < 0.01
-
-                        if not eye_closed and not prev_eye_state:
-                            blink_count += 1
-                        prev_eye_state = not eye_closed
-
-                        # Draw eyes
-                        self._draw_robo_eye(frame, right_center)
-                        self._draw_robo_eye(frame, left_center)
-
-                    except IndexError:
-                        continue
-
-            duration = int(time.time() - start_time)
-            loop_status = "ComparisonLoop" if smile_detected else "Normal"
-            context = self._guess_context(gaze_data, blink_count, face_detected)
-
-            self._put_overlay_text(frame, loop_status, duration, "No", "DetectedGazePattern", context)
-            cv2.imshow("🧠 MirrorMind Live", frame)
-
-            if cv2.waitKey(1) & 0xFF == ord("q"):
-                break
-
-        cap.release()
-        cv2.destroyAllWindows()
-
-        context = self._guess_context(gaze_data, blink_count, face_detected)
+            elapsed = time.time() - start_time if source.live else source.frame_time
+            features = self.analyze_frame(frame, elapsed)
+            face_detected = features["face_detected"]
+            eyes_detected = features["eyes_detected"]
+            smile_detected = features["smile_detected"]
+
+            blinked = False
+            if features["eye_closed"] is not None:
+                eye_closed = features["eye_closed"]
+                if not eye_closed and not prev_eye_state:
+                    blink_count += 1
+                    blinked = True
+                prev_eye_state = not eye_closed
+
+            started = timer.start()
+            if features["gaze"] is not None:
+                gaze_buffer.append(elapsed, *features["iris"])
+                right_x, right_y, left_x, left_y = features["iris"]
+                context_estimator.update(right_x * w, right_y * h, left_x * w, left_y * h)
+
+            duration = int(elapsed)
+            context = context_estimator.context(blink_count, face_detected)
+            timer.stop("context", started)
+            started = timer.start()
+            loop_detector.update(elapsed, features, context, blink=blinked)
+            timer.stop("loop", started)
+            loop_status = loop_detector.state
+            break_suggested = "Yes" if loop_status in ["EscapeLoop", "FreezeLoop"] else "No"
+            if features["reused"]:
+                skips_by_loop = self.inference_stats["motion_skips_by_loop"]
+                skips_by_loop[loop_status] = skips_by_loop.get(loop_status, 0) + 1
+
+            timer.stop("frame", frame_started)
+            timer.record("latency", latency.record(captured_at))
+            timer.frame(grabber.dropped_frames)
+            if on_update is not None:
+                on_update({
+                    "duration": duration,
+                    "loop_status": loop_status,
+                    "context": context,
+                    "face_detected": face_detected,
+                    "blink_count": blink_count,
+                    "latency_ms": round(latency.last_ms, 1),
+                    "overlay_ms": round(self.overlay.last_ms, 3),
+                    "dropped_frames": grabber.dropped_frames,
+                    "stages": timer.line
+                })
+
+            if display is not None:
+                display.submit(
+                    frame, (features["gaze"] or (), loop_status, duration, break_suggested, "DetectedGazePattern", context,
+                            timer.line if self.stage_overlay else None)
+                )
+
+        grabber.stop()
+        if display is not None:
+            display.stop()
+
+        gaze_buffer.close()
+        loop_detector.finish(elapsed)
+        context = context_estimator.context(blink_count, face_detected)
         self.final_gaze_info = {
-            "gaze_data": gaze_data,
+            "gaze_data": gaze_buffer.to_array(),
+            "gaze_samples": gaze_buffer.total,
+            "gaze_history_path": self.gaze_history_path,
             "face_detected": face_detected,
             "eyes_detected": eyes_detected,
             "blink_detected": blink_count > 3,
             "smile_detected": smile_detected,
-            "context": context
+            "context": context,
+            "episodes": loop_detector.episodes,
+            "captured_frames": grabber.captured_frames,
+            "dropped_frames": grabber.dropped_frames,
+            "avg_latency_ms": round(latency.avg_ms, 1),
+            "max_latency_ms": round(latency.max_ms, 1),
+            "avg_overlay_ms": round(self.overlay.avg_ms, 3),
+            "rendered_frames": display.rendered_frames if display is not None else 0,
+            "stage_timings": timer.summary() if timer.enabled else None,
+            **self.inference_stats
         }
 
         return  # Fix for NoneType error when used in for-loop
 
-    def _draw_robo_eye(self, frame, center, color=(255, 0, 0)):
-        x, y = center
-        glow_layers = 4
-        base_radius = 8
-        for i in range(glow_layers):
-            radius = base_radius + i * 4
-            opacity = 1 - i / glow_layers
-            glow_color = tuple(int(c * opacity) for c in color)
-            cv2.circle(frame, (x, y), radius, glow_color, 1)
-        cv2.circle(frame, (x, y), 4, (255, 255, 255), -1)
-
-    def _put_overlay_text(self, frame, loop_type, duration, break_suggested, pattern, context):
-        font = cv2.FONT_HERSHEY_SIMPLEX
-        cv2.putText(frame, f"LoopType: {loop_type}", (10, 30), font, 0.7, (0, 255, 255), 2)
-        cv2.putText(frame, f"Duration: {duration}s", (10, 60), font, 0.7, (255, 255, 255), 2)
-        cv2.putText(frame, f"Break: {break_suggested}", (10, 90), font, 0.7, (0, 0, 255) if break_suggested == "Yes" else (0, 255, 0), 2)
-        cv2.putText(frame, f"Pattern: {pattern}", (10, 120), font, 0.7, (255, 255, 0), 2)
-        cv2.putText(frame, f"Context: {context}", (10, 150), font, 0.7, (255, 128, 0), 2)
-
-    def _guess_context(self, gaze_data, blink_count, face_detected):
-        if not face_detected:
-            return "Escape/Idle"
-        if blink_count > 5:
-            return "Writing/Thinking"
-        if len(gaze_data) < 2:
-            return "Unknown"
-
-        movement = 0
-        prev = gaze_data[0]
-        for point in gaze_data[1:]:
-            dist = np.linalg.norm(np.array(point[0]) - np.array(prev[0])) + \
-                   np.linalg.norm(np.array(point[1]) - np.array(prev[1]))
-            movement += dist
-            prev = point
-
-        avg_movement = movement / len(gaze_data)
-
-        if avg_movement < 5:
-            return "Reading"
-        elif avg_movement < 20:
-            return "Writing"
-        else:
-            return "Browsing"
+    def analyze_frame(self, frame, timestamp=None):
+        # Per-frame features shared by the live loop and offline analysis
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        self.inference_stats["analyzed_frames"] += 1
+        if self._last_features is not None and self.motion_gate is not None \
+                and not self.motion_gate.should_process(frame, self._face_roi):
+            self.inference_stats["motion_skips"] += 1
+            return {**self._last_features, "reused": True}
+
+        scheduler = self.stride_scheduler
+        if scheduler is not None and self._last_features is not None and not scheduler.keyframe_due():
+            self.inference_stats["stride_skips"] += 1
+            h, w, _ = frame.shape
+            points = scheduler.predict(timestamp)
+            return {**self._frame_features(self._last_features["face_detected"], points, w, h), "interpolated": True}
+
+        started = time.perf_counter()
+        self._last_features = self._infer(frame)
+        if scheduler is not None:
+            scheduler.record_keyframe(
+                timestamp,
+                self._last_features["landmarks"],
+                self._last_features["eye_openness"],
+                (time.perf_counter() - started) * 1000
+            )
+        return self._last_features
+
+    def _infer(self, frame):
+        h, w, _ = frame.shape
+        timer = self.stage_timer
+        if not self.use_cascade:
+            started = timer.start()
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            timer.stop("cvtColor", started)
+            return self._run_mesh(rgb_frame, None, w, h)
+
+        recheck_due = self._frames_since_detect >= self.detect_interval
+        if self._face_roi is None and not recheck_due:
+            # Nobody at the desk at the last check, skip all inference
+            self._frames_since_detect += 1
+            return self._frame_features(False, None, w, h)
+
+        started = timer.start()
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        timer.stop("cvtColor", started)
+        if recheck_due:
+            self._face_roi = self._detect_face_roi(rgb_frame, w, h)
+            self._frames_since_detect = 0
+        self._frames_since_detect += 1
+        if self._face_roi is None:
+            return self._frame_features(False, None, w, h)
+
+        features = self._run_mesh(rgb_frame, self._face_roi, w, h)
+        if not features["face_detected"]:
+            self._frames_since_detect = self.detect_interval  # Face left the region, look again
+        return features
+
+    def reset_tracking(self):
+        # Forget the face region and cached features, e.g. when jumping to
+        # another part of a video
+        self._face_roi = None
+        self._frames_since_detect = self.detect_interval
+        self._last_features = None
+        if self.motion_gate is not None:
+            self.motion_gate.reset()
+        if self.stride_scheduler is not None:
+            self.stride_scheduler.reset()
+
+    def _detect_face_roi(self, rgb_frame, w, h):
+        # Pixel box (x0, y0, x1, y1) around the most confident face, or None
+        self.inference_stats["detector_runs"] += 1
+        started = self.stage_timer.start()
+        results = self.face_detector.process(rgb_frame)
+        self.stage_timer.stop("face_detection", started)
+        if not results.detections:
+            return None
+        detection = max(results.detections, key=lambda d: d.score[0])
+        box = detection.location_data.relative_bounding_box
+        margin_x = box.width * self.roi_margin
+        margin_y = box.height * self.roi_margin
+        x0 = int(max(0.0, box.xmin - margin_x) * w)
+        y0 = int(max(0.0, box.ymin - margin_y) * h)
+        x1 = int(min(1.0, box.xmin + box.width + margin_x) * w)
+        y1 = int(min(1.0, box.ymin + box.height + margin_y) * h)
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            return None
+        return x0, y0, x1, y1
+
+    def _run_mesh(self, rgb_frame, roi, w, h):
+        self.inference_stats["mesh_runs"] += 1
+        if roi is not None:
+            x0, y0, x1, y1 = roi
+            rgb_frame = np.ascontiguousarray(rgb_frame[y0:y1, x0:x1])
+        timer = self.stage_timer
+        started = timer.start()
+        results = self.face_mesh.process(rgb_frame)
+        timer.stop("face_mesh", started)
+        started = timer.start()
+
+        points = None
+        if results.multi_face_landmarks:
+            try:
+                points = gather_landmarks(results.multi_face_landmarks[0])
+            except IndexError:
+                pass  # Mesh without iris points
+        if points is not None and roi is not None:
+            # Landmarks are normalized to the crop, map them back to the frame
+            crop_w, crop_h = x1 - x0, y1 - y0
+            right_x, right_y, left_x, left_y, *lip_and_lid_y = points
+            points = ((right_x * crop_w + x0) / w, (right_y * crop_h + y0) / h,
+                      (left_x * crop_w + x0) / w, (left_y * crop_h + y0) / h,
+                      *((y * crop_h + y0) / h for y in lip_and_lid_y))
+        features = self._frame_features(bool(results.multi_face_landmarks), points, w, h)
+        timer.stop("features", started)
+        return features
+
+    def _frame_features(self, face_detected, points, w, h):
+        features = {
+            "face_detected": face_detected,
+            "eyes_detected": False,
+            "smile_detected": False,
+            "eye_closed": None,
+            "eye_openness": None,
+            "gaze": None,
+            "iris": None,
+            "landmarks": points,
+            "reused": False,
+            "interpolated": False
+        }
+        if points is None:
+            return features
+
+        # Iris detection (eyes), smile check and blink detection (basic)
+        iris, lip_gap, eye_openness = face_features(points)
+        right_x, right_y, left_x, left_y = iris
+        features["eyes_detected"] = True
+        features["iris"] = iris
+        features["gaze"] = ((int(right_x * w), int(right_y * h)), (int(left_x * w), int(left_y * h)))
+        features["smile_detected"] = lip_gap > SMILE_LIP_GAP
+        features["eye_openness"] = eye_openness
+        features["eye_closed"] = eye_openness < EYE_CLOSED_OPENNESS
+        return features
@@ -0,0 +1,155 @@
+import os
+import time
+
+import cv2
+import numpy as np
+
+PACING_REALTIME = "realtime"
+PACING_FAST = "fast"
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class FrameSource:
+    # Common interface for everything the tracker can read frames from.
+    # read() mirrors cv2.VideoCapture.read() and returns (ok, frame);
+    # frame_time is the media time of the frame it last returned.
+    live = False
+
+    def __init__(self, pacing=PACING_FAST, fps=30.0):
+        if pacing not in (PACING_REALTIME, PACING_FAST):
+            raise ValueError(f"Unknown pacing mode: {pacing}")
+        self.pacing = pacing
+        self.fps = fps or 30.0
+        self.frame_index = 0
+        self.frame_time = None
+        self._next_due = None
+
+    @property
+    def media_time(self):
+        # Position in the source timeline, in seconds
+        return self.frame_index / self.fps
+
+    def read(self):
+        if self.pacing == PACING_REALTIME:
+            self._wait_for_next_frame()
+        ret, frame = self._read_frame()
+        if ret:
+            self.frame_time = self.media_time
+            self.frame_index += 1
+        return ret, frame
+
+    def _wait_for_next_frame(self):
+        now = time.monotonic()
+        if self._next_due is None:
+            self._next_due = now
+        elif self._next_due > now:
+            time.sleep(self._next_due - now)
+        self._next_due = max(self._next_due, now) + 1.0 / self.fps
+
+    def _read_frame(self):
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+
+class WebcamSource(FrameSource):
+    live = True
+
+    def __init__(self, index=0):
+        self.cap = cv2.VideoCapture(index)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Don't let the driver queue up stale frames
+        # The camera paces itself, so never add our own sleeps on top
+        super().__init__(PACING_FAST, self.cap.get(cv2.CAP_PROP_FPS))
+
+    def _read_frame(self):
+        return self.cap.read()
+
+    def release(self):
+        self.cap.release()
+
+
+class VideoFileSource(FrameSource):
+    def __init__(self, path, pacing=PACING_FAST, start_frame=0):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Video not found: {path}")
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        super().__init__(pacing, self.cap.get(cv2.CAP_PROP_FPS))
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if start_frame:
+            self.seek(start_frame)
+
+    def seek(self, frame_index):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+        self.frame_index = frame_index
+
+    def skip(self):
+        # Advance one frame without decoding it
+        ret = self.cap.grab()
+        if ret:
+            self.frame_index += 1
+        return ret
+
+    def _read_frame(self):
+        return self.cap.read()
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageFolderSource(FrameSource):
+    def __init__(self, folder, pacing=PACING_FAST, fps=30.0, loop=False):
+        self.files = sorted(
+            os.path.join(folder, name) for name in os.listdir(folder)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        if not self.files:
+            raise FileNotFoundError(f"No images found in {folder}")
+        self.loop = loop
+        super().__init__(pacing, fps)
+
+    def _read_frame(self):
+        position = self.frame_index
+        if position >= len(self.files):
+            if not self.loop:
+                return False, None
+            position %= len(self.files)
+        frame = cv2.imread(self.files[position])
+        return frame is not None, frame
+
+
+class SyntheticSource(FrameSource):
+    # Deterministic generated frames for benchmarking the pipeline without a camera
+    def __init__(self, width=640, height=480, num_frames=None, pacing=PACING_FAST, fps=30.0, seed=0):
+        self.width = width
+        self.height = height
+        self.num_frames = num_frames
+        rng = np.random.default_rng(seed)
+        self._background = rng.integers(0, 64, size=(height, width, 3), dtype=np.uint8)
+        super().__init__(pacing, fps)
+
+    def _read_frame(self):
+        if self.num_frames is not None and self.frame_index >= self.num_frames:
+            return False, None
+        frame = self._background.copy()
+        phase = self.frame_index / self.fps
+        center = (
+            int(self.width / 2 + self.width / 4 * np.sin(phase)),
+            int(self.height / 2 + self.height / 8 * np.cos(phase * 0.5)),
+        )
+        cv2.circle(frame, center, self.height // 5, (160, 180, 210), -1)
+        return True, frame
+
+
+def open_source(spec, pacing=None):
+    # "0", "1", ... -> webcam, "synthetic" -> generator, folder -> images, anything else -> video file
+    spec = str(spec)
+    if spec.isdigit():
+        return WebcamSource(int(spec))
+    if spec == "synthetic":
+        return SyntheticSource(pacing=pacing or PACING_FAST)
+    if os.path.isdir(spec):
+        return ImageFolderSource(spec, pacing=pacing or PACING_FAST)
+    return VideoFileSource(spec, pacing=pacing or PACING_FAST)
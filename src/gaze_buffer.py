@@ -0,0 +1,46 @@
+import numpy as np
+
+# One row per gaze sample: seconds since session start, then normalized
+# (0..1) iris centers for the right and left eye.
+GAZE_COLUMNS = ("t", "right_x", "right_y", "left_x", "left_y")
+
+
+class GazeRingBuffer:
+    # Fixed-capacity float32 store for the most recent gaze samples. When a
+    # spill path is given every sample is also appended to that file, so the
+    # full session history is kept on disk instead of in memory. The file
+    # holds one session: it is truncated when the buffer is created, since
+    # t restarts at 0.
+    def __init__(self, capacity=9000, spill_path=None):
+        self.capacity = capacity
+        self._data = np.zeros((capacity, len(GAZE_COLUMNS)), dtype=np.float32)
+        self._next = 0
+        self.total = 0
+        self.spill_path = spill_path
+        self._spill = open(spill_path, "wb") if spill_path else None
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def append(self, t, right_x, right_y, left_x, left_y):
+        row = self._data[self._next]
+        row[:] = (t, right_x, right_y, left_x, left_y)
+        if self._spill is not None:
+            row.tofile(self._spill)
+        self._next = (self._next + 1) % self.capacity
+        self.total += 1
+
+    def to_array(self):
+        # Buffered samples, oldest first
+        if self.total <= self.capacity:
+            return self._data[:self.total].copy()
+        return np.concatenate([self._data[self._next:], self._data[:self._next]])
+
+    def close(self):
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+    @staticmethod
+    def load_history(path):
+        return np.fromfile(path, dtype=np.float32).reshape(-1, len(GAZE_COLUMNS))
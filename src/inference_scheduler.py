@@ -0,0 +1,90 @@
+import math
+
+import numpy as np
+
+from src.landmarks import EYE_CLOSED_OPENNESS, POINT_FIELDS
+
+# Values of the gathered points (POINT_FIELDS) that move between keyframes;
+# the eye lid values are held so extrapolation can never invent a blink
+_IRIS_FIELDS = [POINT_FIELDS.index(f) for f in ("right_iris_x", "right_iris_y", "left_iris_x", "left_iris_y")]
+_MOVING_FIELDS = _IRIS_FIELDS + [POINT_FIELDS.index(f) for f in ("upper_lip_y", "lower_lip_y")]
+
+
+class AdaptiveStride:
+    # Decides which frames run the face mesh ("keyframes") and predicts the
+    # landmarks for the frames in between.
+    #
+    # The stride grows when the gaze is steady and shrinks when it moves fast
+    # (velocity in normalized frame units per second), and it never drops
+    # below what the CPU budget allows given the measured mesh cost. When the
+    # eye openness is close to the blink threshold every frame is a keyframe.
+    def __init__(self, max_stride=4, budget_ms=20.0, slow_velocity=0.02, fast_velocity=0.2,
+                 blink_margin=2.0, max_extrapolation=0.2):
+        self.max_stride = max_stride
+        self.budget_ms = budget_ms
+        self.slow_velocity = slow_velocity
+        self.fast_velocity = fast_velocity
+        self.blink_margin = blink_margin
+        self.max_extrapolation = max_extrapolation  # Seconds past the last keyframe
+        self.reset()
+
+    def reset(self):
+        self.stride = 1
+        self.velocity = 0.0
+        self.infer_ms = 0.0
+        self._since_keyframe = 0
+        self._keyframes = []  # Last two (t, points) pairs
+
+    def keyframe_due(self):
+        self._since_keyframe += 1
+        return self._since_keyframe >= self.stride
+
+    def record_keyframe(self, t, points, eye_openness, infer_ms):
+        self._since_keyframe = 0
+        self.infer_ms = infer_ms if not self.infer_ms else 0.8 * self.infer_ms + 0.2 * infer_ms
+        if points is None:
+            self._keyframes = []
+        else:
+            self._keyframes = (self._keyframes + [(t, np.asarray(points, dtype=np.float32))])[-2:]
+        self.velocity = self._iris_velocity()
+        self.stride = self._choose_stride(eye_openness)
+
+    def _iris_velocity(self):
+        if len(self._keyframes) < 2:
+            return 0.0
+        (t0, p0), (t1, p1) = self._keyframes
+        if t1 <= t0:
+            return 0.0
+        return float(np.abs(p1[_IRIS_FIELDS] - p0[_IRIS_FIELDS]).max() / (t1 - t0))
+
+    def _choose_stride(self, eye_openness):
+        if eye_openness is not None and eye_openness < EYE_CLOSED_OPENNESS * self.blink_margin:
+            return 1  # Possible blink coming, don't miss it
+
+        if self.velocity <= self.slow_velocity:
+            motion_stride = self.max_stride
+        elif self.velocity >= self.fast_velocity:
+            motion_stride = 1
+        else:
+            share = (self.fast_velocity - self.velocity) / (self.fast_velocity - self.slow_velocity)
+            motion_stride = 1 + int(share * (self.max_stride - 1))
+
+        budget_stride = math.ceil(self.infer_ms / self.budget_ms) if self.budget_ms else 1
+        return max(1, min(self.max_stride, max(motion_stride, budget_stride)))
+
+    def predict(self, t):
+        # Points for a frame between keyframes, in gather_landmarks() form:
+        # linear extrapolation of the iris and lip values from the last two
+        # keyframes
+        if not self._keyframes:
+            return None
+        t1, p1 = self._keyframes[-1]
+        if len(self._keyframes) < 2:
+            return tuple(p1.tolist())
+        t0, p0 = self._keyframes[0]
+        if t1 <= t0:
+            return tuple(p1.tolist())
+        ahead = min(t - t1, self.max_extrapolation)
+        predicted = p1.copy()
+        predicted[_MOVING_FIELDS] += (p1[_MOVING_FIELDS] - p0[_MOVING_FIELDS]) * (ahead / (t1 - t0))
+        return tuple(predicted.tolist())
@@ -0,0 +1,225 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime
+
+# Upper bounds (ms) of the fixed histogram buckets: 20 per decade from
+# 0.01 ms to 10 s, so a percentile is off by at most ~12%. Slower samples
+# land in one overflow bucket.
+BUCKET_BOUNDS_MS = [round(0.01 * 10 ** (i / 20), 6) for i in range(121)]
+PERCENTILES = (50, 95, 99)
+# Stages of the live loop, in pipeline order
+STAGES = (
+    "capture",         # Waiting for the grabber's next frame
+    "cvtColor",
+    "face_detection",  # FaceDetection.process
+    "face_mesh",       # FaceMesh.process
+    "features",        # Landmarks to iris / smile / blink features
+    "context",         # Gaze buffer and context estimator
+    "loop",            # StreamingLoopDetector.update
+    "frame",           # Whole per-frame analysis, capture excluded
+    "latency",         # Capture to result
+    "overlay",         # OverlayRenderer.render, display thread
+    "imshow"           # cv2.imshow, display thread
+)
+# Stages shown in the overlay line
+OVERLAY_STAGES = ("face_mesh", "frame", "latency")
+
+
+class StageHistogram:
+    # Count, sum, max and per-bucket counts of one stage's durations
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms):
+        self.counts[bisect_left(BUCKET_BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, p):
+        # Upper bound of the bucket holding the p-th percentile, capped at max
+        if self.count == 0:
+            return 0.0
+        rank = max(1, -(-self.count * p // 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                break
+        bound = BUCKET_BOUNDS_MS[index] if index < len(BUCKET_BOUNDS_MS) else self.max_ms
+        return min(bound, self.max_ms)
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            **{f"p{p}_ms": round(self.percentile(p), 3) for p in PERCENTILES},
+            "max_ms": round(self.max_ms, 3)
+        }
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("timer", "stage", "started")
+
+    def __init__(self, timer, stage):
+        self.timer = timer
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.stop(self.stage, self.started)
+        return False
+
+
+class StageTimer:
+    # Per-stage latency histograms plus per-second frame and drop counters
+    # for the live loop. Hot paths use the start()/stop() pair on the
+    # monotonic perf_counter_ns clock:
+    #     started = timer.start()
+    #     ...
+    #     timer.stop("face_mesh", started)
+    # and span(stage) is the same as a with-block. When disabled, start()
+    # returns 0 and stop()/record()/frame() return at once, so the calls can
+    # stay in place for a few tens of nanoseconds each. Stages can be
+    # recorded from several threads (the display thread times the overlay).
+    # summary() returns everything as a dict, save_json() writes it; line
+    # is a short text form refreshed once a second for the overlay.
+    def __init__(self, enabled=True, history_sec=3600):
+        self.enabled = enabled
+        self.history_sec = history_sec
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stages = {}
+            self.frames = 0
+            self.dropped_frames = 0
+            self.started_at = time.time()
+            self.per_second = deque(maxlen=self.history_sec)  # (second, frames, drops)
+            self.line = None
+            self._second = None
+            self._second_frames = 0
+            self._second_drops = 0
+
+    def start(self):
+        return time.perf_counter_ns() if self.enabled else 0
+
+    def stop(self, stage, started):
+        if started:
+            self.record(stage, (time.perf_counter_ns() - started) / 1e6)
+
+    def span(self, stage):
+        return _Span(self, stage) if self.enabled else _NULL_SPAN
+
+    def record(self, stage, ms):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = StageHistogram()
+            histogram.record(ms)
+
+    def frame(self, dropped_frames=None):
+        # Counts one analyzed frame; dropped_frames is the grabber's running
+        # total, the difference to the last call is this frame's drops
+        if not self.enabled:
+            return
+        second = int(time.monotonic())
+        with self._lock:
+            drops = 0 if dropped_frames is None else max(0, dropped_frames - self.dropped_frames)
+            self.frames += 1
+            self.dropped_frames += drops
+            if second != self._second:
+                if self._second is not None:
+                    self.per_second.append((self._second, self._second_frames, self._second_drops))
+                    for idle in range(self._second + 1, min(second, self._second + self.history_sec)):
+                        self.per_second.append((idle, 0, 0))
+                    self.line = self._format_line()
+                self._second, self._second_frames, self._second_drops = second, 0, 0
+            self._second_frames += 1
+            self._second_drops += drops
+
+    @property
+    def fps(self):
+        # Frames analyzed in the last complete second
+        return self.per_second[-1][1] if self.per_second else 0
+
+    def percentiles(self, stage):
+        histogram = self.stages.get(stage)
+        return {p: histogram.percentile(p) if histogram else 0.0 for p in PERCENTILES}
+
+    def _format_line(self):
+        parts = [f"{stage} {self.stages[stage].percentile(95):.1f}" for stage in OVERLAY_STAGES if stage in self.stages]
+        _, frames, drops = self.per_second[-1]
+        return f"p95 ms: {' | '.join(parts) or '-'} | {frames} fps, {drops} dropped"
+
+    def summary(self):
+        with self._lock:
+            per_second = list(self.per_second)
+            if self._second is not None:
+                per_second.append((self._second, self._second_frames, self._second_drops))
+            stages = {stage: self.stages[stage].summary()
+                      for stage in sorted(self.stages, key=lambda s: STAGES.index(s) if s in STAGES else len(STAGES))}
+            frames, dropped = self.frames, self.dropped_frames
+        rates = [count for _, count, _ in per_second[:-1]] or [count for _, count, _ in per_second]
+        return {
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds"),
+            "frames": frames,
+            "dropped_frames": dropped,
+            "fps": {
+                "mean": round(sum(rates) / len(rates), 1) if rates else 0.0,
+                "min": min(rates, default=0),
+                "max": max(rates, default=0)
+            },
+            "per_second": [
+                {"t": second - per_second[0][0], "frames": count, "dropped": drops}
+                for second, count, drops in per_second
+            ],
+            "stages": stages
+        }
+
+    def save_json(self, path):
+        return save_summary(path, self.summary())
+
+
+def save_summary(path, summary):
+    # Writes a StageTimer.summary() dict as JSON, creating the directory
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    return path
+
+
+def stage_summary_path(log_path, started=None):
+    # data/loop_log_dataset.csv -> data/loop_log_dataset.stages/<session start>.json;
+    # started is a datetime or an ISO string like summary()["started_at"]
+    if isinstance(started, str):
+        started = datetime.fromisoformat(started)
+    started = started or datetime.now()
+    return os.path.join(os.path.splitext(log_path)[0] + ".stages", started.strftime("%Y%m%d-%H%M%S") + ".json")
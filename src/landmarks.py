@@ -0,0 +1,40 @@
+import numpy as np
+
+# MediaPipe FaceMesh indices (refine_landmarks=True adds the iris points 468+)
+RIGHT_IRIS = 468
+LEFT_IRIS = 473
+UPPER_LIP = 13
+LOWER_LIP = 14
+LEFT_EYE_TOP = 159
+LEFT_EYE_BOTTOM = 145
+
+# What gather_landmarks returns, in order: normalized iris x/y, and only y
+# for the lip and eye lid points
+POINT_FIELDS = ("right_iris_x", "right_iris_y", "left_iris_x", "left_iris_y",
+                "upper_lip_y", "lower_lip_y", "left_eye_top_y", "left_eye_bottom_y")
+
+SMILE_LIP_GAP = 0.03
+EYE_CLOSED_OPENNESS = 0.01
+
+
+def landmarks_to_array(face_landmarks):
+    # Whole face as an (N, 3) float32 array of normalized x, y, z
+    return np.array([(p.x, p.y, p.z) for p in face_landmarks.landmark], dtype=np.float32)
+
+
+def gather_landmarks(face_landmarks):
+    # The values the features need, read point by point like the old inline
+    # tracker code, as one flat tuple in POINT_FIELDS order. Building an
+    # array or a row per point costs several times more than the lookups.
+    # Raises IndexError when the mesh has no iris points.
+    landmark = face_landmarks.landmark
+    right_iris, left_iris = landmark[RIGHT_IRIS], landmark[LEFT_IRIS]
+    return (right_iris.x, right_iris.y, left_iris.x, left_iris.y, landmark[UPPER_LIP].y, landmark[LOWER_LIP].y,
+            landmark[LEFT_EYE_TOP].y, landmark[LEFT_EYE_BOTTOM].y)
+
+
+def face_features(points):
+    # Features from gather_landmarks() points: normalized iris centers
+    # (right x/y, left x/y), lip gap and left eye openness
+    right_x, right_y, left_x, left_y, upper_lip, lower_lip, eye_top, eye_bottom = points
+    return (right_x, right_y, left_x, left_y), abs(upper_lip - lower_lip), abs(eye_top - eye_bottom)
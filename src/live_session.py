@@ -0,0 +1,122 @@
+import threading
+import time
+
+from src.face_gaze_tracker import FaceGazeTracker
+
+
+class LiveTrackingSession:
+    # Runs FaceGazeTracker.stream_gaze_overlay_live on a worker thread so the
+    # caller (a Streamlit session) stays responsive. The tracker publishes its
+    # per-frame state here; snapshot() returns a copy that is safe to read
+    # from any thread. on_finish(gaze_info, duration_sec) runs on the worker
+    # once the stream ends and its return value becomes snapshot()["result"];
+    # on_episode(episode, started_at) runs for every loop episode as it closes.
+    # The tracker runs headless by default (no OpenCV window on the worker);
+    # pass a PreviewPublisher to get annotated frames for the page.
+    def __init__(self, source_factory=None, tracker_factory=FaceGazeTracker, on_finish=None,
+                 headless=True, preview=None, on_episode=None):
+        self.source_factory = source_factory
+        self.tracker_factory = tracker_factory
+        self.on_finish = on_finish
+        self.on_episode = on_episode
+        self.headless = headless
+        self.preview = preview
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._fps_window = (time.monotonic(), 0)
+        self._state = self._initial_state()
+
+    @staticmethod
+    def _initial_state():
+        return {
+            "running": False,
+            "started_at": None,
+            "duration": 0,
+            "loop_status": None,
+            "context": None,
+            "face_detected": False,
+            "blink_count": 0,
+            "fps": 0.0,
+            "latency_ms": 0.0,
+            "overlay_ms": 0.0,
+            "dropped_frames": 0,
+            "stages": None,
+            "frames": 0,
+            "episodes": 0,
+            "last_episode": None,
+            "result": None,
+            "error": None
+        }
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return self
+        self._stop_event.clear()
+        with self._lock:
+            self._state = {**self._initial_state(), "running": True, "started_at": time.time()}
+        self._fps_window = (time.monotonic(), 0)
+        self._thread = threading.Thread(target=self._run, name="mirrormind-live", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        # Asks the tracker to finish its current frame and waits for the result
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._state)
+
+    def _publish(self, update):
+        # Called by the tracker for every frame; FPS is counted per second
+        now = time.monotonic()
+        window_start, window_frames = self._fps_window
+        window_frames += 1
+        fps = None
+        if now - window_start >= 1.0:
+            fps = window_frames / (now - window_start)
+            window_start, window_frames = now, 0
+        self._fps_window = (window_start, window_frames)
+        with self._lock:
+            self._state.update(update)
+            self._state["frames"] += 1
+            if fps is not None:
+                self._state["fps"] = round(fps, 1)
+
+    def _episode_closed(self, episode):
+        with self._lock:
+            self._state["episodes"] += 1
+            self._state["last_episode"] = episode
+            started_at = self._state["started_at"]
+        if self.on_episode is not None:
+            self.on_episode(episode, started_at)
+
+    def _run(self):
+        result, error = None, None
+        started = time.time()
+        try:
+            tracker = self.tracker_factory()
+            source = self.source_factory() if self.source_factory is not None else None
+            if self.preview is not None:
+                self.preview.start()
+            tracker.stream_gaze_overlay_live(
+                source, stop_event=self._stop_event, on_update=self._publish,
+                headless=self.headless, preview=self.preview, on_episode=self._episode_closed
+            )
+            if self.on_finish is not None:
+                result = self.on_finish(tracker.final_gaze_info, time.time() - started)
+        except Exception as e:
+            error = str(e)
+            print("❌ Live tracking failed:", e)
+        finally:
+            if self.preview is not None:
+                self.preview.stop()
+        with self._lock:
+            self._state.update(running=False, result=result, error=error)
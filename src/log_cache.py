@@ -0,0 +1,90 @@
+import csv
+import io
+import os
+import threading
+
+import pandas as pd
+
+_CHECK_BYTES = 64  # Bytes before the parsed offset used to spot a rewritten file
+
+
+class IncrementalLogLoader:
+    # Keeps a parsed CSV log in memory between Streamlit reruns. refresh()
+    # does nothing while the file's size and mtime are unchanged, parses only
+    # the appended tail when the file has grown, and falls back to a full
+    # reload when the file was replaced or rewritten. Chart counts come from
+    # the log rollups (src/log_rollups.py), not from here.
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.columns = None
+        self._chunks = []
+        self._frame = None
+        self._offset = 0
+        self._check = b""
+        self._stat_key = None
+        self.rows = 0
+
+    def refresh(self):
+        with self._lock:
+            stat = os.stat(self.path)
+            stat_key = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            if stat_key == self._stat_key:
+                return 0
+            with open(self.path, "rb") as f:
+                if self.columns is None or stat.st_size < self._offset or not self._prefix_unchanged(f):
+                    self._reset()
+                    header = f.readline()
+                    self.columns = next(csv.reader([header.decode("utf-8")]), [])
+                    self._offset = len(header)
+                    self._check = header[-_CHECK_BYTES:]
+                added = self._read_tail(f)
+            self._stat_key = stat_key
+            return added
+
+    def _prefix_unchanged(self, f):
+        start = max(0, self._offset - _CHECK_BYTES)
+        f.seek(start)
+        return f.read(self._offset - start) == self._check
+
+    def _read_tail(self, f):
+        f.seek(self._offset)
+        data = f.read()
+        end = data.rfind(b"\n") + 1  # A half-written last line waits for the next refresh
+        if end == 0:
+            return 0
+        chunk = pd.read_csv(io.BytesIO(data[:end]), header=None, names=self.columns, dtype=str)
+        self._offset += end
+        self._check = (self._check + data[max(0, end - _CHECK_BYTES):end])[-_CHECK_BYTES:]
+        if chunk.empty:
+            return 0
+
+        self._chunks.append(chunk)
+        self._frame = None
+        self.rows += len(chunk)
+        return len(chunk)
+
+    @property
+    def frame(self):
+        # Whole log as one DataFrame; only concatenated when asked for
+        with self._lock:
+            if self._frame is None:
+                self._frame = pd.concat(self._chunks, ignore_index=True) if self._chunks \
+                    else pd.DataFrame(columns=self.columns)
+                self._chunks = [self._frame]
+            return self._frame
+
+    def tail(self, n=10):
+        with self._lock:
+            parts, count = [], 0
+            for chunk in reversed(self._chunks):
+                parts.append(chunk.tail(n - count))
+                count += len(parts[-1])
+                if count >= n:
+                    break
+            if not parts:
+                return pd.DataFrame(columns=self.columns)
+            return pd.concat(parts[::-1]).reset_index(drop=True)
@@ -0,0 +1,139 @@
+import csv
+import os
+import re
+
+import pandas as pd
+
+from src.utils import DURATION_PATTERN, UNIT_SECONDS
+
+# Column layout of the clean dataset
+CLEAN_COLUMNS = ["Timestamp", "TimeOfDay", "PatternDetected", "LoopType", "DurationSec", "ContextTag", "BreakSuggested"]
+CATEGORY_COLUMNS = ["PatternDetected", "LoopType", "ContextTag", "BreakSuggested"]
+# Older logs wrote Pattern/Context instead of PatternDetected/ContextTag
+COLUMN_ALIASES = {"Pattern": "PatternDetected", "Context": "ContextTag"}
+
+
+def parse_durations(values):
+    # "6.7 min" / "30 sec" / "915 sec" -> integer seconds (nullable Int64)
+    parts = values.astype("string").str.extract(DURATION_PATTERN, flags=re.IGNORECASE)
+    units = parts["unit"].str.lower().fillna("sec").map(UNIT_SECONDS)
+    seconds = pd.to_numeric(parts["amount"], errors="coerce") * units
+    return seconds.round().astype("Int64")
+
+
+def _find_header(path):
+    # (header names, position of the first header cell, raw row width)
+    with open(path, newline="", encoding="utf-8") as f:
+        cells = [cell.strip() for cell in next(csv.reader(f), [])]
+    if "LoopType" not in cells:
+        raise ValueError(f"No log header found in the first row of {path}")
+    offset = cells.index("Timestamp")
+    names = [cell for cell in cells[offset:] if cell]
+    return names, offset, len(cells)
+
+
+def _realign(raw, names, offset):
+    # Take the header-aligned block of each row. Files whose header row is
+    # shifted right (data written before the header was) keep their older
+    # rows in the leading columns, so those rows are moved across.
+    width = len(names)
+    primary = raw.iloc[:, offset:offset + width].copy()
+    primary.columns = names
+    if offset >= width:
+        shifted = raw.iloc[:, :width]
+        shifted.columns = names
+        primary_empty = (primary == "").all(axis=1) | (primary == names).all(axis=1)
+        use_shifted = primary_empty & (shifted["LoopType"] != "")
+        primary.loc[use_shifted] = shifted.loc[use_shifted].values
+    return primary
+
+
+def normalize_frame(frame):
+    # Merge column aliases and type every column; drops rows without a loop type
+    frame = frame.copy()
+    for alias, name in COLUMN_ALIASES.items():
+        if alias in frame.columns:
+            if name in frame.columns:
+                frame[name] = frame[name].where(frame[name] != "", frame[alias])
+            else:
+                frame[name] = frame[alias]
+    frame = frame[(frame["LoopType"] != "") & (frame["LoopType"] != "LoopType")]
+
+    timestamps = frame["Timestamp"].str.strip()
+    clean = pd.DataFrame({
+        "Timestamp": pd.to_datetime(timestamps, format="%Y-%m-%d %H:%M:%S", errors="coerce"),
+        "TimeOfDay": timestamps.str[-8:],
+        "PatternDetected": frame["PatternDetected"],
+        "LoopType": frame["LoopType"],
+        "DurationSec": parse_durations(frame["Duration"]),
+        "ContextTag": frame["ContextTag"],
+        "BreakSuggested": frame["BreakSuggested"]
+    }, index=frame.index)
+    for column in CATEGORY_COLUMNS:
+        clean[column] = clean[column].replace("", pd.NA).astype("category")
+    return clean[CLEAN_COLUMNS].reset_index(drop=True)
+
+
+def iter_normalized(path, chunksize=100000):
+    names, offset, width = _find_header(path)
+    chunks = pd.read_csv(
+        path, header=None, names=range(width), dtype=str, keep_default_na=False,
+        chunksize=chunksize, encoding="utf-8"
+    )
+    for raw in chunks:
+        yield normalize_frame(_realign(raw, names, offset))
+
+
+def _parquet_schema():
+    # Fixed schema so every chunk's categories share one dictionary type
+    import pyarrow as pa
+    category = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("Timestamp", pa.timestamp("s")),
+        ("TimeOfDay", pa.string()),
+        ("PatternDetected", category),
+        ("LoopType", category),
+        ("DurationSec", pa.int64()),
+        ("ContextTag", category),
+        ("BreakSuggested", category)
+    ])
+
+
+class _CleanWriter:
+    # Appends normalized chunks to a .parquet file or a CSV
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self._parquet = output_path.lower().endswith(".parquet")
+        self._writer = None
+        self._schema = _parquet_schema() if self._parquet else None
+        self.rows = 0
+        if os.path.exists(output_path):
+            os.remove(output_path)
+
+    def write(self, chunk):
+        if self._parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(chunk, schema=self._schema, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.output_path, self._schema, compression="zstd")
+            self._writer.write_table(table)
+        else:
+            chunk.to_csv(self.output_path, mode="a", header=self.rows == 0, index=False)
+        self.rows += len(chunk)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def normalize_logs(input_paths, output_path, chunksize=100000):
+    # Stream every input through the normalizer into one clean dataset
+    writer = _CleanWriter(output_path)
+    try:
+        for path in input_paths:
+            for chunk in iter_normalized(path, chunksize):
+                writer.write(chunk)
+    finally:
+        writer.close()
+    return writer.rows
@@ -0,0 +1,155 @@
+import csv
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+
+from src.sqlite_log_store import COLUMN_ALIASES, is_sqlite_path, row_to_record
+from src.utils import is_parquet_path, parse_timestamp
+
+DIMENSIONS = {"LoopType": "loop_type", "ContextTag": "context", "BreakSuggested": "break_suggested"}
+GRANULARITIES = ("hour", "day", "all")
+UNDATED = "undated"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollups (
+    granularity TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    dimension TEXT NOT NULL,
+    value TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    duration_sec REAL NOT NULL,
+    PRIMARY KEY (granularity, bucket, dimension, value)
+) WITHOUT ROWID;
+"""
+UPSERT = """
+INSERT INTO rollups (granularity, bucket, dimension, value, count, duration_sec) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (granularity, bucket, dimension, value)
+DO UPDATE SET count = count + excluded.count, duration_sec = duration_sec + excluded.duration_sec
+"""
+
+
+def rollup_path(log_path):
+    # data/loop_log_dataset.csv -> data/loop_log_dataset.rollups.db
+    return os.path.splitext(str(log_path).rstrip("/\\"))[0] + ".rollups.db"
+
+
+def _buckets(timestamp):
+    parsed = parse_timestamp(timestamp)
+    if parsed is None:
+        return (("hour", UNDATED), ("day", UNDATED), ("all", ""))
+    return (("hour", parsed.strftime("%Y-%m-%d %H:00")), ("day", parsed.strftime("%Y-%m-%d")), ("all", ""))
+
+
+class LogRollups:
+    # Counts and duration sums per LoopType, ContextTag and BreakSuggested,
+    # bucketed per hour, per day and overall, kept in a small SQLite file next
+    # to the raw log. The logging path adds every row it writes, so dashboard
+    # charts read a handful of pre-aggregated rows instead of scanning the log.
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def is_empty(self):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM rollups LIMIT 1").fetchone() is None
+
+    def add_rows(self, rows):
+        totals = defaultdict(lambda: [0, 0.0])
+        for record in map(row_to_record, rows):
+            if record is None:
+                continue
+            values = dict(zip(COLUMN_ALIASES, record))
+            for granularity, bucket in _buckets(values["timestamp"]):
+                for dimension, column in DIMENSIONS.items():
+                    entry = totals[(granularity, bucket, dimension, values[column] or "")]
+                    entry[0] += 1
+                    entry[1] += values["duration_sec"] or 0.0
+        with self._lock, self._conn:
+            self._conn.executemany(UPSERT, [key + tuple(entry) for key, entry in totals.items()])
+
+    def rebuild(self, log_path, batch_size=10000):
+        # Recompute everything from the raw log (CSV, SQLite or Parquet)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM rollups")
+        batch = []
+        for row in _read_log_rows(log_path):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                self.add_rows(batch)
+                batch = []
+        self.add_rows(batch)
+
+    def totals(self, dimension):
+        # [(value, count, duration_sec)] over the whole log, largest first
+        return self.series(dimension, "all")
+
+    def series(self, dimension, granularity, start=None, end=None):
+        # [(bucket, value, count, duration_sec)] for hour/day buckets; start
+        # and end are bucket strings ("YYYY-MM-DD" or "YYYY-MM-DD HH:00")
+        if dimension not in DIMENSIONS or granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown rollup {granularity}/{dimension}")
+        if granularity == "all":
+            query = ("SELECT value, count, duration_sec FROM rollups WHERE granularity = 'all' AND bucket = '' "
+                     "AND dimension = ? ORDER BY count DESC")
+            params = [dimension]
+        else:
+            query = ("SELECT bucket, value, count, duration_sec FROM rollups "
+                     "WHERE granularity = ? AND dimension = ? AND bucket != ? AND bucket >= ? AND bucket <= ? "
+                     "ORDER BY bucket")
+            params = [granularity, dimension, UNDATED, start or "", end or "\uffff"]
+        with self._lock:
+            return self._conn.execute(query, params).fetchall()
+
+
+def _read_log_rows(log_path):
+    # Rows as log CSV dicts, whatever the backend
+    csv_names = [names[0] for names in COLUMN_ALIASES.values()]
+    if is_sqlite_path(log_path):
+        conn = sqlite3.connect(log_path)
+        try:
+            for values in conn.execute(f"SELECT {', '.join(COLUMN_ALIASES)} FROM loop_log"):
+                yield dict(zip(csv_names, values))
+        finally:
+            conn.close()
+    elif is_parquet_path(log_path):
+        from src.parquet_log_store import open_store as open_parquet_store
+        for batch in open_parquet_store(log_path).read(columns=list(COLUMN_ALIASES)).to_batches():
+            for values in batch.to_pylist():
+                timestamp = values["timestamp"]
+                values["timestamp"] = timestamp.strftime("%Y-%m-%d %H:%M:%S") if timestamp else UNDATED
+                yield dict(zip(csv_names, values.values()))
+    else:
+        with open(log_path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+
+
+_rollups = {}
+_rollups_lock = threading.Lock()
+
+
+def open_rollups(log_path, appended_rows=None):
+    # Shared rollups for a log; created (and backfilled from the existing log)
+    # on first use. appended_rows are rows just written to the log: they are
+    # added unless this call's backfill already counted them.
+    db_path = rollup_path(log_path)
+    backfilled = False
+    with _rollups_lock:
+        if db_path not in _rollups:
+            rollups = LogRollups(db_path)
+            if rollups.is_empty() and os.path.exists(log_path):
+                rollups.rebuild(log_path)
+                backfilled = True
+            _rollups[db_path] = rollups
+        rollups = _rollups[db_path]
+    if appended_rows is not None and not backfilled:
+        rollups.add_rows(appended_rows)
+    return rollups
@@ -1,3 +1,32 @@
+from collections import Counter, deque, namedtuple
+
+import numpy as np
+
+# Seconds a new loop type has to persist before the detector switches to it
+ENTER_SEC = {
+    "Normal": 3.0,
+    "ConsumptionLoop": 0.0,  # Already implies 120 s of calm
+    "EscapeLoop": 5.0,
+    "FreezeLoop": 5.0,
+    "DoubtLoop": 2.0,
+    "ComparisonLoop": 1.0
+}
+# Seconds a loop type is held at least once it has been entered
+MIN_DWELL_SEC = {
+    "Normal": 5.0,
+    "ConsumptionLoop": 10.0,
+    "EscapeLoop": 10.0,
+    "FreezeLoop": 10.0,
+    "DoubtLoop": 5.0,
+    "ComparisonLoop": 5.0
+}
+LOOP_TYPES = tuple(ENTER_SEC)  # Every label classify_loop can return
+LOOP_TYPES = tuple(ENTER_SEC)  # Every label classify_loop can return
+CALM_LOOPS = ("Normal", "ConsumptionLoop")  # Stretches that count toward the 120 s rule
+# Column order of plain 2-D arrays passed to classify_batch
+BATCH_COLUMNS = ["scroll_detected", "face_detected", "eyes_detected", "blink_detected", "smile_detected", "duration_sec"]
+
+
 class LoopDetector:
     def __init__(self):
         pass
@@ -17,3 +46,162 @@ class LoopDetector:
             return "ConsumptionLoop"
         else:
             return "Normal"
+
+    def classify_batch(self, table, duration_sec=None):
+        # classify_loop over every row of a feature table at once: a pandas
+        # DataFrame, a dict of columns, a structured array, or a 2-D array with
+        # BATCH_COLUMNS in order. Missing flag columns count as False, like a
+        # missing dict key; duration_sec (scalar or array) overrides the column.
+        # Returns an array of loop type labels.
+        columns, rows = _batch_columns(table)
+        duration = columns.get("duration_sec") if duration_sec is None else duration_sec
+        duration = np.broadcast_to(np.asarray(np.nan if duration is None else duration, dtype=float), (rows,))
+
+        flags = {name: _truthy(columns.get(name), rows) for name in BATCH_COLUMNS[:-1]}
+        face = flags["face_detected"]
+        return np.select(
+            [flags["scroll_detected"], ~face, face & ~flags["eyes_detected"],
+             flags["blink_detected"], flags["smile_detected"], duration > 120],
+            ["ConsumptionLoop", "EscapeLoop", "FreezeLoop", "DoubtLoop", "ComparisonLoop", "ConsumptionLoop"],
+            default="Normal"
+        )
+
+
+def _batch_columns(table):
+    # ({column name: values}, row count) for the supported table types
+    if hasattr(table, "columns") and hasattr(table, "index"):  # pandas DataFrame
+        return {name: table[name].to_numpy() for name in table.columns if name in BATCH_COLUMNS}, len(table)
+    if isinstance(table, dict):
+        columns = {name: np.asarray(values) for name, values in table.items() if name in BATCH_COLUMNS}
+        return columns, max((len(values) for values in columns.values()), default=0)
+    table = np.asarray(table)
+    if table.dtype.names:
+        return {name: table[name] for name in table.dtype.names if name in BATCH_COLUMNS}, len(table)
+    if table.ndim != 2 or table.shape[1] > len(BATCH_COLUMNS):
+        raise ValueError(f"Expected a 2-D array with up to {len(BATCH_COLUMNS)} columns {BATCH_COLUMNS}")
+    return dict(zip(BATCH_COLUMNS, table.T)), len(table)
+
+
+def _truthy(values, rows):
+    # Python truthiness per element (NaN is truthy, None and "" are not)
+    if values is None:
+        return np.zeros(rows, dtype=bool)
+    values = np.asarray(values)
+    if values.dtype == bool:
+        return values
+    if values.dtype.kind in "iufc":
+        return values != 0
+    if values.dtype.kind in "US":
+        return values != values.dtype.type()
+    return np.frompyfunc(bool, 1, 1)(values).astype(bool)
+
+
+class LoopEpisode(namedtuple("LoopEpisode", ["start", "end", "loop_type", "context"])):
+    __slots__ = ()
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+
+class StreamingLoopDetector:
+    # Live version of classify_loop. Each update() classifies one frame with
+    # the same rules (blink_detected = more than blink_threshold blinks in the
+    # last blink_window_sec, duration = length of the current calm stretch),
+    # then applies hysteresis: a new loop type takes over only after it has
+    # persisted for ENTER_SEC[type] and the current one has been held for
+    # MIN_DWELL_SEC[current]. The switch is backdated to when the new type
+    # first appeared (or the end of the dwell time, if later). Closed
+    # episodes are returned by update()/finish() and passed to on_episode.
+    # Every update is O(1).
+    def __init__(self, enter_sec=None, min_dwell_sec=None, blink_window_sec=10.0, blink_threshold=3,
+                 on_episode=None):
+        self.enter_sec = {**ENTER_SEC, **(enter_sec or {})}
+        self.min_dwell_sec = {**MIN_DWELL_SEC, **(min_dwell_sec or {})}
+        self.blink_window_sec = blink_window_sec
+        self.blink_threshold = blink_threshold
+        self.on_episode = on_episode
+        self.rules = LoopDetector()
+        self.reset()
+
+    def reset(self):
+        self.state = None
+        self.state_start = None
+        self.candidate = None
+        self.candidate_since = None
+        self.last_time = None
+        self.episodes = []
+        self._calm_since = None
+        self._blinks = deque()
+        self._contexts = Counter()
+        self._candidate_contexts = Counter()
+
+    def update(self, t, features, context=None, blink=False):
+        # features: per-frame dict with face_detected / eyes_detected /
+        # smile_detected (and optionally scroll_detected); blink marks a
+        # completed blink on this frame
+        self.last_time = t
+        if blink:
+            self._blinks.append(t)
+        while self._blinks and self._blinks[0] < t - self.blink_window_sec:
+            self._blinks.popleft()
+
+        gaze_info = {**features, "blink_detected": len(self._blinks) > self.blink_threshold}
+        calm_duration = t - self._calm_since if self._calm_since is not None else 0.0
+        loop_type = self.rules.classify_loop(gaze_info, calm_duration)
+        if loop_type not in CALM_LOOPS:
+            self._calm_since = None
+        elif self._calm_since is None:
+            self._calm_since = t
+
+        if self.state is None:
+            self._enter(loop_type, t)
+        if loop_type == self.state:
+            if self.candidate is not None:
+                # The candidate did not last, its frames stay with the current episode
+                self._contexts.update(self._candidate_contexts)
+                self._candidate_contexts.clear()
+                self.candidate = None
+            self._contexts[context] += 1
+            return None
+
+        if loop_type != self.candidate:
+            self._contexts.update(self._candidate_contexts)
+            self._candidate_contexts.clear()
+            self.candidate = loop_type
+            self.candidate_since = t
+        self._candidate_contexts[context] += 1
+        switch_at = max(self.candidate_since, self.state_start + self.min_dwell_sec.get(self.state, 0.0))
+        if t - self.candidate_since < self.enter_sec.get(loop_type, 0.0) or t < switch_at:
+            return None
+
+        episode = self._close(switch_at, self._contexts)
+        contexts = self._candidate_contexts
+        self._enter(self.candidate, switch_at)
+        self._contexts, self._candidate_contexts = contexts, Counter()
+        return episode
+
+    def finish(self, t=None):
+        # Closes the open episode, e.g. when the session ends
+        if self.state is None:
+            return None
+        self._contexts.update(self._candidate_contexts)
+        episode = self._close(self.last_time if t is None else t, self._contexts)
+        self.state = None
+        self.candidate = None
+        self._candidate_contexts = Counter()
+        return episode
+
+    def _enter(self, loop_type, t):
+        self.state = loop_type
+        self.state_start = t
+        self.candidate = None
+        self._contexts = Counter()
+
+    def _close(self, end, contexts):
+        context = contexts.most_common(1)[0][0] if contexts else None
+        episode = LoopEpisode(self.state_start, end, self.state, context)
+        self.episodes.append(episode)
+        if self.on_episode is not None:
+            self.on_episode(episode)
+        return episode
@@ -0,0 +1,342 @@
+import csv
+import os
+import threading
+from array import array
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from src.log_normalizer import iter_normalized
+from src.loop_detector import LOOP_TYPES, LoopDetector
+
+MODEL_PATH = "models/loop_classifier.pkl"
+COMPILED_PATH = "models/loop_classifier.npz"  # Same tree as flat arrays, loadable without sklearn
+SESSION_FEATURES_PATH = "data/session_features.csv"
+ARTIFACT_FORMAT = 2  # Bumped when the artifact layout changes; older files are ignored
+# (format 1 models were trained on log rows only and never saw a gaze flag)
+
+# Model inputs. Gaze flags are 1/0, or -1 when unknown (log rows only carry
+# duration, context and time of day); context is an index into the
+# artifact's context list.
+FEATURES = [
+    "face_detected", "eyes_detected", "blink_detected", "smile_detected", "scroll_detected",
+    "duration_sec", "context", "hour"
+]
+GAZE_FLAGS = FEATURES[:5]
+SESSION_COLUMNS = ["Timestamp", *GAZE_FLAGS, "DurationSec", "ContextTag", "LoopType"]
+UNKNOWN = -1
+# Training needs at least this many rows with gaze flags (from live sessions)
+MIN_GAZE_ROWS = 50
+
+
+def _flag(value):
+    return UNKNOWN if value is None else int(bool(value))
+
+
+def append_session_features(gaze_info, duration_sec, context, loop_type, path=SESSION_FEATURES_PATH):
+    # One training row per live session, next to the loop log
+    row = {
+        "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        **{name: _flag(gaze_info.get(name)) for name in GAZE_FLAGS},
+        "DurationSec": round(duration_sec, 1),
+        "ContextTag": context,
+        "LoopType": loop_type
+    }
+    new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=SESSION_COLUMNS, lineterminator="\n")
+        if new_file:
+            writer.writeheader()
+        writer.writerows([row])
+
+
+def _load_log(path):
+    # Clean log rows (see log_normalizer); normalize-log output is read as is
+    if path.lower().endswith(".parquet"):
+        clean = pd.read_parquet(path)
+    else:
+        clean = pd.concat(list(iter_normalized(path)), ignore_index=True)
+    hours = pd.to_numeric(clean["TimeOfDay"].str[:2], errors="coerce")
+    frame = pd.DataFrame({name: UNKNOWN for name in GAZE_FLAGS}, index=clean.index)
+    frame["duration_sec"] = clean["DurationSec"].astype("float64")
+    frame["context"] = clean["ContextTag"].astype("string")
+    frame["hour"] = hours
+    frame["loop_type"] = clean["LoopType"].astype("string")
+    return frame
+
+
+def _load_sessions(path):
+    sessions = pd.read_csv(path, dtype={"ContextTag": "string", "LoopType": "string"})
+    frame = sessions[GAZE_FLAGS].fillna(UNKNOWN).astype("int64")
+    frame["duration_sec"] = pd.to_numeric(sessions["DurationSec"], errors="coerce")
+    frame["context"] = sessions["ContextTag"]
+    frame["hour"] = pd.to_datetime(sessions["Timestamp"], errors="coerce").dt.hour
+    frame["loop_type"] = sessions["LoopType"]
+    return frame
+
+
+def build_training_set(log_paths, session_paths=(), sources=None):
+    # sources, if given, collects the paths that were actually read
+    frames = [_load_log(path) for path in log_paths]
+    read_sessions = [path for path in session_paths if os.path.exists(path)]
+    frames += [_load_sessions(path) for path in read_sessions]
+    if sources is not None:
+        sources.extend(map(str, [*log_paths, *read_sessions]))
+    data = pd.concat(frames, ignore_index=True)
+    data = data[data["loop_type"].notna()]
+    contexts = sorted(data["context"].dropna().unique().tolist())
+    codes = {context: index for index, context in enumerate(contexts)}
+    data["context"] = data["context"].map(codes).fillna(UNKNOWN)
+    data[["duration_sec", "hour"]] = data[["duration_sec", "hour"]].fillna(UNKNOWN)
+    X = data[FEATURES].to_numpy(dtype=np.float32)
+    y = data["loop_type"].to_numpy(dtype=object)
+    return X, y, contexts
+
+
+def train_model(log_paths, session_paths=(), output_path=MODEL_PATH, max_depth=12, min_samples_leaf=2,
+                test_size=0.2, seed=0):
+    # Decision tree over FEATURES: holdout accuracy is measured on a split,
+    # then the shipped model is refit on every row. Saved uncompressed so
+    # joblib can memory-map it. Only rows with known gaze flags and a loop
+    # type the rule engine produces are used: log rows carry no gaze flags,
+    # and a model trained on them is a context lookup that contradicts the
+    # rules. With fewer than MIN_GAZE_ROWS such rows no artifact is written.
+    import joblib
+    import sklearn
+    from sklearn.model_selection import train_test_split
+    from sklearn.tree import DecisionTreeClassifier
+
+    sources = []
+    X, y, contexts = build_training_set(log_paths, session_paths, sources)
+    usable = (X[:, :len(GAZE_FLAGS)] != UNKNOWN).any(axis=1) & np.isin(y, LOOP_TYPES)
+    skipped_rows = int(len(y) - usable.sum())
+    X, y = X[usable], y[usable]
+    if len(y) < MIN_GAZE_ROWS:
+        raise ValueError(f"Only {len(y)} session feature rows with gaze flags, at least {MIN_GAZE_ROWS} needed; "
+                         f"run more live sessions first (they are recorded to {SESSION_FEATURES_PATH})")
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=seed)
+    model = DecisionTreeClassifier(max_depth=max_depth, min_samples_leaf=min_samples_leaf, random_state=seed)
+    holdout_accuracy = float(model.fit(X_train, y_train).score(X_test, y_test))
+    model.fit(X, y)
+
+    trained_at = datetime.now()
+    artifact = {
+        "format": ARTIFACT_FORMAT,
+        "version": trained_at.strftime("%Y%m%d-%H%M%S"),
+        "trained_at": trained_at.isoformat(timespec="seconds"),
+        "sklearn_version": sklearn.__version__,
+        "features": FEATURES,
+        "contexts": contexts,
+        "classes": model.classes_.tolist(),
+        "model": model,
+        "metrics": {
+            "rows": len(y),
+            "skipped_rows": skipped_rows,
+            "holdout_accuracy": round(holdout_accuracy, 4),
+            "depth": model.get_depth()
+        },
+        "sources": sources
+    }
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    joblib.dump(artifact, output_path)
+    export_model(artifact, compiled_path(output_path), check_rows=X)
+    return artifact
+
+
+def compiled_path(model_path):
+    # models/loop_classifier.pkl -> models/loop_classifier.npz
+    return os.path.splitext(model_path)[0] + ".npz"
+
+
+def export_model(artifact, output_path=COMPILED_PATH, check_rows=None, seed=0):
+    # Flattens the artifact's decision tree into NumPy arrays (.npz, no
+    # pickles). The export is checked against model.predict on check_rows
+    # plus random rows over the feature ranges; any difference raises.
+    model = artifact["model"]
+    tree = model.tree_
+    compiled = {
+        "children_left": tree.children_left.astype(np.int32),
+        "children_right": tree.children_right.astype(np.int32),
+        "feature": tree.feature.astype(np.int32),
+        "threshold": tree.threshold.astype(np.float64),
+        "leaf_class": tree.value[:, 0, :].argmax(axis=1).astype(np.int32),
+        "classes": np.array(artifact["classes"], dtype=str),
+        "contexts": np.array(artifact["contexts"], dtype=str),
+        "features": np.array(artifact["features"], dtype=str),
+        "format": np.array(artifact["format"]),
+        "version": np.array(artifact["version"])
+    }
+
+    rng = np.random.default_rng(seed)
+    random_rows = np.column_stack([
+        rng.integers(UNKNOWN, 2, (10000, len(GAZE_FLAGS))),
+        rng.uniform(UNKNOWN, 1200, 10000),
+        rng.integers(UNKNOWN, len(artifact["contexts"]), 10000),
+        rng.integers(UNKNOWN, 24, 10000)
+    ]).astype(np.float32)
+    rows = random_rows if check_rows is None else np.vstack([np.asarray(check_rows, dtype=np.float32), random_rows])
+    expected = model.predict(rows)
+    evaluator = CompiledTree(compiled)
+    if not (evaluator.predict_batch(rows) == expected).all() \
+            or any(evaluator.predict_row(row) != label for row, label in zip(rows.tolist(), expected)):
+        raise ValueError("Exported tree does not match model.predict")
+
+    np.savez(output_path, **compiled)
+    return output_path
+
+
+class CompiledTree:
+    # Evaluator for an exported tree: predict_row walks plain Python lists
+    # (microseconds per row, no NumPy call overhead), predict_batch walks all
+    # rows level by level with array indexing. Inputs are rounded to float32
+    # first, like sklearn does, so the labels match predict exactly.
+    def __init__(self, arrays):
+        self.classes = [str(label) for label in arrays["classes"]]
+        self.contexts = [str(context) for context in arrays["contexts"]]
+        self.version = str(arrays["version"])
+        left = np.asarray(arrays["children_left"])
+        right = np.asarray(arrays["children_right"])
+        feature = np.asarray(arrays["feature"])
+        threshold = np.asarray(arrays["threshold"])
+        self._leaf_class = np.asarray(arrays["leaf_class"])
+        self._nodes = (
+            left.tolist(),
+            right.tolist(),
+            feature.tolist(),
+            threshold.tolist(),
+            [self.classes[i] for i in self._leaf_class]
+        )
+        # Batch copies where leaves point to themselves, so every row can take
+        # the same number of steps without masking finished rows
+        leaves = left == -1
+        nodes = np.arange(len(left), dtype=left.dtype)
+        self._batch_left = np.where(leaves, nodes, left)
+        self._batch_right = np.where(leaves, nodes, right)
+        self._batch_feature = np.where(leaves, 0, feature)
+        self._batch_threshold = np.where(leaves, np.inf, threshold)
+        self._depth = self._max_depth(left.tolist(), right.tolist())
+
+    @classmethod
+    def load(cls, path=COMPILED_PATH):
+        with np.load(path, allow_pickle=False) as arrays:
+            if int(arrays["format"]) != ARTIFACT_FORMAT or arrays["features"].tolist() != FEATURES:
+                raise ValueError(f"{path} is not a format {ARTIFACT_FORMAT} loop model")
+            return cls({name: arrays[name] for name in arrays.files})
+
+    def predict_row(self, values):
+        values = array("f", values)
+        left, right, feature, threshold, labels = self._nodes
+        node = 0
+        while left[node] != -1:
+            node = left[node] if values[feature[node]] <= threshold[node] else right[node]
+        return labels[node]
+
+    def predict_batch(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))
+        node = np.zeros(len(X), dtype=self._batch_left.dtype)
+        for _ in range(self._depth):
+            go_left = X[rows, self._batch_feature[node]] <= self._batch_threshold[node]
+            node = np.where(go_left, self._batch_left[node], self._batch_right[node])
+        return np.array(self.classes, dtype=object)[self._leaf_class[node]]
+
+    @staticmethod
+    def _max_depth(left, right):
+        depth, level = 0, [0]
+        while True:
+            level = [child for node in level if left[node] != -1 for child in (left[node], right[node])]
+            if not level:
+                return depth
+            depth += 1
+
+
+class LoopClassifier:
+    # Loop type predictions from the trained model, loaded on first use.
+    # The compiled export (models/loop_classifier.npz, written by train-model
+    # and export-model) is preferred: it needs neither scikit-learn nor
+    # joblib, which keeps them out of the live loop. If only the joblib
+    # artifact is there, it is loaded instead, memory-mapped when mmap is
+    # set, and flattened in memory. Fallback: with no usable model
+    # (missing, empty like the shipped placeholder, or another format)
+    # predict() returns LoopDetector.classify_loop's label.
+    def __init__(self, model_path=MODEL_PATH, mmap=True):
+        self.model_path = model_path
+        self.compiled_path = compiled_path(model_path)
+        self.mmap = mmap
+        self.rules = LoopDetector()
+        self.tree = None
+        self._context_codes = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def available(self):
+        return self.load()
+
+    @property
+    def version(self):
+        return self.tree.version if self.load() else None
+
+    def load(self):
+        # True once a usable model is in memory
+        if self._loaded:
+            return self.tree is not None
+        with self._lock:
+            if not self._loaded:
+                self.tree = self._load_tree()
+                if self.tree is not None:
+                    self._context_codes = {context: index for index, context in enumerate(self.tree.contexts)}
+                self._loaded = True
+        return self.tree is not None
+
+    def _load_tree(self):
+        def usable(path):
+            return os.path.exists(path) and os.path.getsize(path) > 0
+
+        try:
+            if usable(self.compiled_path):
+                tree = CompiledTree.load(self.compiled_path)
+            elif usable(self.model_path):
+                tree = self._load_artifact_tree()
+            else:
+                return None
+            if not set(tree.classes) <= set(LOOP_TYPES):
+                raise ValueError("the model predicts loop types the rule engine does not produce")
+            return tree
+        except Exception as e:
+            print("❌ Loop model could not be loaded, using the rule engine:", e)
+            return None
+
+    def _load_artifact_tree(self):
+        import joblib
+        artifact = joblib.load(self.model_path, mmap_mode="r" if self.mmap else None)
+        if not isinstance(artifact, dict) or artifact.get("format") != ARTIFACT_FORMAT \
+                or artifact.get("features") != FEATURES:
+            raise ValueError(f"{self.model_path} is not a format {ARTIFACT_FORMAT} loop model")
+        print(f"ℹ️ Loaded {self.model_path} through scikit-learn, run `mirrormind.py export-model` to skip it")
+        tree = artifact["model"].tree_
+        return CompiledTree({
+            "children_left": tree.children_left,
+            "children_right": tree.children_right,
+            "feature": tree.feature,
+            "threshold": tree.threshold,
+            "leaf_class": tree.value[:, 0, :].argmax(axis=1),
+            "classes": artifact["classes"],
+            "contexts": artifact["contexts"],
+            "version": artifact["version"]
+        })
+
+    def features(self, gaze_info, duration_sec, context=None, timestamp=None):
+        context = gaze_info.get("context") if context is None else context
+        return [
+            *(_flag(gaze_info.get(name)) for name in GAZE_FLAGS),
+            duration_sec,
+            self._context_codes.get(context, UNKNOWN),
+            (timestamp or datetime.now()).hour
+        ]
+
+    def predict(self, gaze_info, duration_sec, context=None, timestamp=None):
+        if not self.load():
+            return self.rules.classify_loop(gaze_info, duration_sec)
+        return self.tree.predict_row(self.features(gaze_info, duration_sec, context, timestamp))
@@ -0,0 +1,36 @@
+import cv2
+
+
+class MotionGate:
+    # Cheap change detector run ahead of the face models: the frame (or just
+    # the face region, when known) is shrunk to a small grayscale thumbnail and
+    # compared with the thumbnail of the last frame that went through inference.
+    def __init__(self, threshold=8, min_changed=0.002, refresh_interval=30, size=(64, 48)):
+        self.threshold = threshold  # Per-pixel change, 0-255 gray levels
+        self.min_changed = min_changed  # Fraction of thumbnail pixels that must change
+        self.refresh_interval = refresh_interval
+        self.size = size
+        self.last_changed = 0.0
+        self.reset()
+
+    def reset(self):
+        self._reference = None
+        self._reference_roi = None
+        self._frames_since_refresh = 0
+
+    def should_process(self, frame, roi=None):
+        if roi is not None:
+            x0, y0, x1, y1 = roi
+            frame = frame[y0:y1, x0:x1]
+        thumbnail = cv2.cvtColor(cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        self._frames_since_refresh += 1
+        if self._reference is not None and roi == self._reference_roi \
+                and self._frames_since_refresh < self.refresh_interval:
+            changed = cv2.absdiff(thumbnail, self._reference) > self.threshold
+            self.last_changed = float(changed.mean())
+            if self.last_changed < self.min_changed:
+                return False
+        self._reference = thumbnail
+        self._reference_roi = roi
+        self._frames_since_refresh = 0
+        return True
@@ -0,0 +1,105 @@
+import time
+
+import cv2
+import numpy as np
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+FONT_SCALE = 0.7
+FONT_THICKNESS = 2
+
+
+def _blit(frame, sprite, mask, x, y):
+    # Copies the sprite pixels under its (0/255) alpha mask to frame with the
+    # sprite's top-left at (x, y), clipped to the frame
+    h, w = frame.shape[:2]
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + sprite.shape[1], w), min(y + sprite.shape[0], h)
+    if x0 >= x1 or y0 >= y1:
+        return
+    sx, sy = x0 - x, y0 - y
+    cv2.copyTo(
+        sprite[sy:sy + y1 - y0, sx:sx + x1 - x0],
+        mask[sy:sy + y1 - y0, sx:sx + x1 - x0],
+        frame[y0:y1, x0:x1]
+    )
+
+
+class OverlayRenderer:
+    # Draws the live overlay from cached pieces. The robo-eye glow is drawn
+    # once into a sprite with an alpha mask and copied at each iris position;
+    # every text line keeps its last rasterized patch and is only redrawn
+    # with putText when its text changes. Alpha is binary so a blit is one
+    # masked cv2.copyTo: the eyes match the old circles pixel for pixel,
+    # text edges lose their anti-aliasing. last_ms / avg_ms hold the
+    # time spent per rendered frame. An optional stats line (e.g. the stage
+    # timer's p95 summary) goes below the five fixed lines.
+    def __init__(self, eye_color=(255, 0, 0), glow_layers=4, base_radius=8, line_origin=(10, 30), line_step=30):
+        self.line_origin = line_origin
+        self.line_step = line_step
+        self.eye_sprite, self.eye_mask, self.eye_offset = self._render_eye(eye_color, glow_layers, base_radius)
+        self._lines = {}  # slot -> (text, color, patch, mask, top-left offset)
+        self.last_ms = 0.0
+        self.avg_ms = 0.0
+        self.text_renders = 0
+        self._alpha = 0.1
+
+    @staticmethod
+    def _render_eye(color, glow_layers, base_radius):
+        radius = base_radius + (glow_layers - 1) * 4 + 1  # Outer ring plus its 1px stroke
+        size = 2 * radius + 1
+        sprite = np.zeros((size, size, 3), np.uint8)
+        mask = np.zeros((size, size), np.uint8)
+        center = (radius, radius)
+        for i in range(glow_layers):
+            ring_radius = base_radius + i * 4
+            opacity = 1 - i / glow_layers
+            glow_color = tuple(int(c * opacity) for c in color)
+            cv2.circle(sprite, center, ring_radius, glow_color, 1)
+            cv2.circle(mask, center, ring_radius, 255, 1)
+        cv2.circle(sprite, center, 4, (255, 255, 255), -1)
+        cv2.circle(mask, center, 4, 255, -1)
+        return sprite, mask, radius
+
+    def draw_eye(self, frame, center):
+        x, y = center
+        _blit(frame, self.eye_sprite, self.eye_mask, x - self.eye_offset, y - self.eye_offset)
+
+    def draw_line(self, frame, slot, text, color):
+        # Text at the slot's row, re-rasterized only when text or color changed
+        cached = self._lines.get(slot)
+        if cached is None or cached[0] != text or cached[1] != color:
+            cached = (text, color, *self._render_text(text, color))
+            self._lines[slot] = cached
+            self.text_renders += 1
+        _, _, patch, mask, (dx, dy) = cached
+        x, y = self.line_origin[0], self.line_origin[1] + slot * self.line_step
+        _blit(frame, patch, mask, x + dx, y + dy)
+
+    @staticmethod
+    def _render_text(text, color):
+        (width, height), baseline = cv2.getTextSize(text, FONT, FONT_SCALE, FONT_THICKNESS)
+        pad = FONT_THICKNESS + 2
+        origin = (pad, height + pad)
+        size = (height + baseline + 2 * pad, width + 2 * pad)
+        patch = np.zeros((*size, 3), np.uint8)
+        mask = np.zeros(size, np.uint8)
+        cv2.putText(mask, text, origin, FONT, FONT_SCALE, 255, FONT_THICKNESS)
+        patch[:] = color
+        # Anti-aliased coverage becomes a binary alpha at 50%
+        mask = np.where(mask >= 128, 255, 0).astype(np.uint8)
+        return patch, mask, (-origin[0], -origin[1])
+
+    def render(self, frame, eye_centers, loop_type, duration, break_suggested, pattern, context, stats_line=None):
+        started = time.perf_counter()
+        for center in eye_centers:
+            self.draw_eye(frame, center)
+        self.draw_line(frame, 0, f"LoopType: {loop_type}", (0, 255, 255))
+        self.draw_line(frame, 1, f"Duration: {duration}s", (255, 255, 255))
+        self.draw_line(frame, 2, f"Break: {break_suggested}", (0, 0, 255) if break_suggested == "Yes" else (0, 255, 0))
+        self.draw_line(frame, 3, f"Pattern: {pattern}", (255, 255, 0))
+        self.draw_line(frame, 4, f"Context: {context}", (255, 128, 0))
+        if stats_line:
+            self.draw_line(frame, 5, stats_line, (200, 200, 200))
+        self.last_ms = (time.perf_counter() - started) * 1000
+        self.avg_ms = self.last_ms if self.avg_ms == 0.0 else self.avg_ms + self._alpha * (self.last_ms - self.avg_ms)
+        return self.last_ms
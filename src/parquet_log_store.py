@@ -0,0 +1,184 @@
+import csv
+import os
+import threading
+import time
+import uuid
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from src.sqlite_log_store import COLUMN_ALIASES, row_to_record
+from src.utils import parse_timestamp
+
+CATEGORICAL_COLUMNS = ["pattern", "loop_type", "context", "break_suggested"]
+_category = pa.dictionary(pa.int32(), pa.string())
+SCHEMA = pa.schema([
+    ("timestamp", pa.timestamp("s")),
+    ("pattern", _category),
+    ("loop_type", _category),
+    ("duration_sec", pa.float64()),
+    ("context", _category),
+    ("break_suggested", _category)
+])
+PARTITIONING = ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive")
+UNDATED = "undated"  # Partition for legacy rows that only carry a time of day
+
+
+class ParquetLogStore:
+    # Columnar loop log: a directory of Parquet files partitioned by day
+    # (root/date=YYYY-MM-DD/*.parquet). Every write adds one small file;
+    # compact() merges the small files of a day into one.
+    def __init__(self, root, compact_min_files=8):
+        self.root = root
+        self.compact_min_files = compact_min_files
+        self._compactor = None
+        self._stop_compaction = threading.Event()
+        self._lock = threading.Lock()  # Writers vs compaction of the same day
+        os.makedirs(root, exist_ok=True)
+
+    def _partition_dir(self, date):
+        return os.path.join(self.root, f"date={date}")
+
+    def _write_table(self, date, table, prefix="part"):
+        directory = self._partition_dir(date)
+        os.makedirs(directory, exist_ok=True)
+        name = f"{prefix}-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet"
+        # Dot-prefixed files are ignored by readers until the rename
+        temp_path = os.path.join(directory, "." + name)
+        pq.write_table(table, temp_path, use_dictionary=CATEGORICAL_COLUMNS, compression="zstd")
+        os.replace(temp_path, os.path.join(directory, name))
+
+    def write_rows(self, rows):
+        by_date = {}
+        for record in map(row_to_record, rows):
+            if record is None:
+                continue
+            values = dict(zip(COLUMN_ALIASES, record))
+            values["timestamp"] = parse_timestamp(values["timestamp"])
+            date = values["timestamp"].strftime("%Y-%m-%d") if values["timestamp"] else UNDATED
+            by_date.setdefault(date, []).append(values)
+
+        with self._lock:
+            for date, records in by_date.items():
+                self._write_table(date, pa.Table.from_pylist(records, schema=SCHEMA))
+        return sum(len(records) for records in by_date.values())
+
+    def import_csv(self, csv_path, batch_size=50000):
+        imported = 0
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            batch = []
+            for row in csv.DictReader(f):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    imported += self.write_rows(batch)
+                    batch = []
+            imported += self.write_rows(batch)
+        return imported
+
+    def compact(self):
+        # Merge each day's files into one once it has compact_min_files of them
+        merged = 0
+        for entry in sorted(os.listdir(self.root)):
+            if not entry.startswith("date="):
+                continue
+            directory = os.path.join(self.root, entry)
+            with self._lock:
+                files = sorted(
+                    os.path.join(directory, name) for name in os.listdir(directory)
+                    if name.endswith(".parquet") and not name.startswith(".")
+                )
+                if len(files) < self.compact_min_files:
+                    continue
+                table = pa.concat_tables([pq.read_table(path, schema=SCHEMA) for path in files])
+                table = table.sort_by("timestamp") if entry != f"date={UNDATED}" else table
+                self._write_table(entry[len("date="):], table, prefix="compact")
+                for path in files:
+                    os.remove(path)
+            merged += len(files)
+        return merged
+
+    def start_compaction(self, interval_sec=3600):
+        if self._compactor is not None:
+            return
+        self._stop_compaction.clear()
+
+        def run():
+            while not self._stop_compaction.wait(interval_sec):
+                try:
+                    self.compact()
+                except Exception as e:
+                    print("❌ Log compaction failed:", e)
+
+        self._compactor = threading.Thread(target=run, name="mirrormind-compaction", daemon=True)
+        self._compactor.start()
+
+    def stop_compaction(self):
+        if self._compactor is not None:
+            self._stop_compaction.set()
+            self._compactor.join()
+            self._compactor = None
+
+    def read(self, start_date=None, end_date=None, loop_types=None, columns=None):
+        # Arrow table of matching rows. Dates ("YYYY-MM-DD", inclusive) prune
+        # whole partitions; loop types are pushed down to the row groups.
+        dataset = ds.dataset(self.root, format="parquet", partitioning=PARTITIONING, schema=self._dataset_schema())
+        condition = None
+        if start_date or end_date:
+            condition = ds.field("date") != UNDATED
+            if start_date:
+                condition &= ds.field("date") >= str(start_date)
+            if end_date:
+                condition &= ds.field("date") <= str(end_date)
+        if loop_types:
+            loop_filter = ds.field("loop_type").isin(list(loop_types))
+            condition = loop_filter if condition is None else condition & loop_filter
+        return dataset.to_table(columns=columns, filter=condition)
+
+    def read_pandas(self, **filters):
+        return self.read(**filters).to_pandas()
+
+    def dates(self):
+        # Dates that have a partition, oldest first (legacy undated rows excluded)
+        prefix = "date="
+        return sorted(entry[len(prefix):] for entry in os.listdir(self.root)
+                      if entry.startswith(prefix) and entry != prefix + UNDATED)
+
+    def recent(self, limit=10, start_date=None, end_date=None, loop_types=None):
+        # The newest limit rows, oldest first, reading one day at a time from
+        # the latest partition back so only the last few days are scanned.
+        # Undated legacy rows count as the oldest and are only read without
+        # a date range.
+        tables = []
+        found = 0
+        dates = self.dates()
+        if not (start_date or end_date) and os.path.isdir(self._partition_dir(UNDATED)):
+            dates.insert(0, UNDATED)
+        for date in reversed(dates):
+            if date != UNDATED and ((start_date and date < str(start_date)) or (end_date and date > str(end_date))):
+                continue
+            dataset = ds.dataset(self._partition_dir(date), format="parquet", schema=SCHEMA)
+            table = dataset.to_table(filter=ds.field("loop_type").isin(list(loop_types)) if loop_types else None)
+            tables.append(table if date == UNDATED else table.sort_by("timestamp"))
+            found += table.num_rows
+            if found >= limit:
+                break
+        if not tables:
+            return SCHEMA.empty_table()
+        table = pa.concat_tables(reversed(tables))
+        return table.slice(max(0, table.num_rows - limit))
+
+    @staticmethod
+    def _dataset_schema():
+        return SCHEMA.append(pa.field("date", pa.string()))
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(root):
+    with _stores_lock:
+        if root not in _stores:
+            _stores[root] = ParquetLogStore(root)
+        return _stores[root]
@@ -1,25 +1,190 @@
-import pandas as pd
+import atexit
+import csv
 import os
+import queue
+import threading
+import time
 from datetime import datetime
 
-def log_pattern(pattern, loop_type, duration_sec, context, break_suggested, file_path):
-    new_row = {
-        "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+from src.log_rollups import open_rollups
+from src.sqlite_log_store import is_sqlite_path, open_store
+from src.utils import is_parquet_path
+
+LOG_COLUMNS = ["Timestamp", "PatternDetected", "LoopType", "Duration", "ContextTag", "BreakSuggested"]
+
+
+def build_row(pattern, loop_type, duration_sec, context, break_suggested, timestamp=None):
+    # timestamp (datetime) defaults to now, e.g. episodes pass their start time.
+    # DurationSec keeps the exact seconds for the SQLite / Parquet / rollup
+    # backends; the CSV log only has the rounded Duration column.
+    return {
+        "Timestamp": (timestamp or datetime.now()).strftime("%Y-%m-%d %H:%M:%S"),
         "PatternDetected": pattern,
         "LoopType": loop_type,
         "Duration": f"{round(duration_sec / 60, 1)} min",  # convert sec to min
         "ContextTag": context,
-        "BreakSuggested": break_suggested
+        "BreakSuggested": break_suggested,
+        "DurationSec": duration_sec
     }
 
-    try:
-        if os.path.exists(file_path):
-            df = pd.read_csv(file_path)
-            df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
+
+def _read_header(f):
+    f.seek(0)
+    return next(csv.reader([f.readline()]), [])
+
+
+def _ends_with_newline(f):
+    f.seek(0, os.SEEK_END)
+    if f.tell() == 0:
+        return True
+    f.seek(f.tell() - 1)
+    return f.read(1) == "\n"
+
+
+def append_rows(file_path, rows, update_rollups=True):
+    # .db/.sqlite paths go to the SQLite backend, a *.parquet directory to the
+    # Parquet store, anything else is a CSV log. The dashboard rollups next to
+    # the log are only opened and updated once the write has succeeded, so a
+    # rejected write leaves no rollups behind.
+    if is_sqlite_path(file_path):
+        open_store(file_path).insert_rows(rows)
+    elif is_parquet_path(file_path):
+        from src.parquet_log_store import open_store as open_parquet_store  # pyarrow is only needed here
+        open_parquet_store(file_path).write_rows(rows)
+    else:
+        _append_csv_rows(file_path, rows)
+    if update_rollups:
+        open_rollups(file_path, appended_rows=rows)
+
+
+def _append_csv_rows(file_path, rows):
+    # Appends without touching existing rows: the header is written only when
+    # the file is new, and rows are aligned to whatever header the file has
+    # (older logs carry extra columns). Data is fsynced before returning.
+    with open(file_path, "a+", newline="", encoding="utf-8") as f:
+        header = _read_header(f)
+        if not header:
+            header = LOG_COLUMNS
+            f.write(",".join(header) + "\n")
         else:
-            df = pd.DataFrame([new_row])
+            missing = [column for column in LOG_COLUMNS if column not in header]
+            if missing:
+                raise ValueError(f"{file_path} is missing log columns: {missing}")
+            if not _ends_with_newline(f):
+                f.write("\n")
+
+        writer = csv.DictWriter(f, fieldnames=header, restval="", extrasaction="ignore", lineterminator="\n")
+        writer.writerows(rows)
+        f.flush()
+        os.fsync(f.fileno())
+
 
-        df.to_csv(file_path, index=False)
+def log_pattern(pattern, loop_type, duration_sec, context, break_suggested, file_path, timestamp=None):
+    new_row = build_row(pattern, loop_type, duration_sec, context, break_suggested, timestamp)
+
+    try:
+        append_rows(file_path, [new_row])
         print(f"✅ Logged: {new_row}")
     except Exception as e:
         print("❌ Logging failed:", e)
+
+
+_FLUSH = object()
+_STOP = object()
+
+
+class AsyncPatternLogger:
+    # Moves log I/O off the caller's thread. Rows go through a bounded queue
+    # to a writer thread that appends them in batches, once batch_size rows
+    # are waiting or flush_interval seconds after the first one arrived.
+    # When the queue is full, rows are dropped (and counted) unless
+    # block_when_full is set, in which case the caller waits.
+    # logger.log_pattern has the same signature as the module-level function.
+    def __init__(self, max_queue=1000, batch_size=50, flush_interval=1.0, block_when_full=False):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.block_when_full = block_when_full
+        self.logged = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._close_lock = threading.Lock()  # Orders rows and flush markers before the stop marker
+        self._thread = threading.Thread(target=self._run, name="mirrormind-logger", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log_pattern(self, pattern, loop_type, duration_sec, context, break_suggested, file_path, timestamp=None):
+        row = build_row(pattern, loop_type, duration_sec, context, break_suggested, timestamp)
+        # Checked and queued under the lock so no row can land after the stop
+        # marker, where the writer would never see it
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError("Logger is closed")
+            try:
+                self._queue.put((file_path, row), block=self.block_when_full)
+                return True
+            except queue.Full:
+                self.dropped += 1
+                return False
+
+    def flush(self):
+        # Blocks until everything queued so far is on disk; after close()
+        # the writer has already drained the queue, so there is nothing to do
+        with self._close_lock:
+            if self._closed:
+                return
+            self._queue.put(_FLUSH)
+        self._queue.join()
+
+    def close(self):
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join()
+        atexit.unregister(self.close)
+
+    def _run(self):
+        pending = []
+        deadline = None
+        while True:
+            timeout = None if not pending else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None  # Flush interval elapsed
+
+            if item is _FLUSH or item is _STOP or item is None:
+                self._write(pending)
+                pending = []
+                if item is not None:
+                    self._queue.task_done()
+                if item is _STOP:
+                    return
+                continue
+
+            if not pending:
+                deadline = time.monotonic() + self.flush_interval
+            pending.append(item)
+            if len(pending) >= self.batch_size:
+                self._write(pending)
+                pending = []
+
+    def _write(self, items):
+        if not items:
+            return
+        by_file = {}
+        for file_path, row in items:
+            by_file.setdefault(file_path, []).append(row)
+        for file_path, rows in by_file.items():
+            try:
+                append_rows(file_path, rows)
+                self.logged += len(rows)
+                print(f"✅ Logged {len(rows)} row(s) to {file_path}")
+            except Exception as e:
+                self.failed += len(rows)
+                print("❌ Logging failed:", e)
+        for _ in items:
+            self._queue.task_done()
@@ -0,0 +1,165 @@
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), "..", "app", "templates", "index.html")
+BOUNDARY = "mirrormindframe"
+
+
+class PreviewPublisher:
+    # Turns annotated frames into a low-rate JPEG preview without slowing the
+    # analysis loop: publish() only keeps a reference to the frame when the
+    # next preview is due (at most max_fps), and the encoding happens on a
+    # worker thread. If the worker is still busy, the older pending frame is
+    # replaced, never queued. Readers get the latest JPEG bytes, or an MJPEG
+    # stream through frames() / serve().
+    def __init__(self, max_fps=5.0, quality=70, max_width=640):
+        self.min_interval = 1.0 / max_fps
+        self.quality = quality
+        self.max_width = max_width
+        self.published_frames = 0
+        self.encoded_frames = 0
+        self._cond = threading.Condition()
+        self._pending = None
+        self._jpeg = None
+        self._jpeg_id = 0
+        self._next_due = 0.0
+        self._running = False
+        self._thread = None
+        self._server = None
+
+    def start(self):
+        if self._running:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._encode_loop, name="mirrormind-preview", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        # Stops encoding; the last JPEG and the HTTP server stay available
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def due(self):
+        # Cheap check so callers can skip drawing the overlay between previews
+        return self._running and time.monotonic() >= self._next_due
+
+    def publish(self, frame):
+        # The caller must not draw on the frame afterwards
+        now = time.monotonic()
+        if not self._running or now < self._next_due:
+            return False
+        self._next_due = now + self.min_interval
+        with self._cond:
+            self._pending = frame
+            self._cond.notify_all()
+        self.published_frames += 1
+        return True
+
+    def _encode_loop(self):
+        params = [int(cv2.IMWRITE_JPEG_QUALITY), self.quality]
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None or not self._running)
+                if not self._running:
+                    return
+                frame, self._pending = self._pending, None
+
+            h, w = frame.shape[:2]
+            if self.max_width and w > self.max_width:
+                frame = cv2.resize(frame, (self.max_width, int(h * self.max_width / w)), interpolation=cv2.INTER_AREA)
+            ok, encoded = cv2.imencode(".jpg", frame, params)
+            if not ok:
+                continue
+            with self._cond:
+                self._jpeg = encoded.tobytes()
+                self._jpeg_id += 1
+                self.encoded_frames += 1
+                self._cond.notify_all()
+
+    def latest_jpeg(self):
+        with self._cond:
+            return self._jpeg
+
+    def frames(self, timeout=5.0):
+        # Yields each new JPEG as it is encoded; ends when the publisher stops
+        # or nothing arrives for timeout seconds
+        last_id = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._jpeg_id > last_id or not self._running, timeout)
+                if not self._running or self._jpeg_id == last_id:
+                    return
+                last_id = self._jpeg_id
+                jpeg = self._jpeg
+            yield jpeg
+
+    def serve(self, host="127.0.0.1", port=8554):
+        # Small HTTP server: / (app/templates/index.html), /stream.mjpg and
+        # /latest.jpg. Runs on its own thread until close().
+        if self._server is not None:
+            return self._server
+        self._server = ThreadingHTTPServer((host, port), _handler_for(self))
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="mirrormind-preview-http", daemon=True).start()
+        return self._server
+
+
+def _handler_for(publisher):
+    class PreviewHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path in ("/", "/index.html"):
+                with open(TEMPLATE_PATH, "rb") as f:
+                    self._send(200, "text/html; charset=utf-8", f.read())
+            elif self.path.startswith("/latest.jpg"):
+                jpeg = publisher.latest_jpeg()
+                if jpeg is None:
+                    self._send(503, "text/plain", b"No preview yet")
+                else:
+                    self._send(200, "image/jpeg", jpeg)
+            elif self.path.startswith("/stream.mjpg"):
+                self._stream()
+            else:
+                self._send(404, "text/plain", b"Not found")
+
+        def _send(self, status, content_type, body):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _stream(self):
+            self.send_response(200)
+            self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            try:
+                for jpeg in publisher.frames():
+                    self.wfile.write(
+                        f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n".encode()
+                    )
+                    self.wfile.write(jpeg + b"\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # Viewer closed the page
+
+        def log_message(self, format, *args):
+            pass
+
+    return PreviewHandler
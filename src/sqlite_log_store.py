@@ -0,0 +1,150 @@
+import csv
+import sqlite3
+import threading
+
+from src.utils import parse_duration_sec
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS loop_log (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    pattern TEXT,
+    loop_type TEXT NOT NULL,
+    duration_sec REAL,
+    context TEXT,
+    break_suggested TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_loop_log_timestamp ON loop_log (timestamp);
+CREATE INDEX IF NOT EXISTS idx_loop_log_loop_type ON loop_log (loop_type);
+CREATE INDEX IF NOT EXISTS idx_loop_log_context ON loop_log (context);
+"""
+
+# Log CSV column -> table column; older logs use Pattern/Context. Rows from
+# build_row carry the exact DurationSec next to the rounded Duration text.
+COLUMN_ALIASES = {
+    "timestamp": ("Timestamp",),
+    "pattern": ("PatternDetected", "Pattern"),
+    "loop_type": ("LoopType",),
+    "duration_sec": ("DurationSec", "Duration"),
+    "context": ("ContextTag", "Context"),
+    "break_suggested": ("BreakSuggested",)
+}
+GROUPABLE_COLUMNS = ("loop_type", "context", "break_suggested", "pattern")
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+
+def is_sqlite_path(file_path):
+    return str(file_path).lower().endswith(SQLITE_SUFFIXES)
+
+
+def _first_value(row, names):
+    for name in names:
+        value = row.get(name)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def row_to_record(row):
+    # Log row dict (as built by pattern_logger.build_row or read from a CSV)
+    # -> tuple in table column order, or None for rows without a loop type
+    values = {column: _first_value(row, names) for column, names in COLUMN_ALIASES.items()}
+    if not values["loop_type"] or not values["timestamp"]:
+        return None
+    values["duration_sec"] = parse_duration_sec(values["duration_sec"])
+    return tuple(values[column] for column in COLUMN_ALIASES)
+
+
+class SQLiteLogStore:
+    # Loop log in SQLite (WAL mode) with indexes for the viewer's filters.
+    # One connection is shared between threads, guarded by a lock.
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def insert_rows(self, rows):
+        records = [record for record in map(row_to_record, rows) if record is not None]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO loop_log ({', '.join(COLUMN_ALIASES)}) VALUES (?, ?, ?, ?, ?, ?)",
+                records
+            )
+        return len(records)
+
+    def import_csv(self, csv_path, batch_size=1000):
+        # One-shot import of an existing CSV log, streamed in batches
+        imported = 0
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            batch = []
+            for row in csv.DictReader(f):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    imported += self.insert_rows(batch)
+                    batch = []
+            imported += self.insert_rows(batch)
+        return imported
+
+    def _where(self, start=None, end=None, loop_types=None, contexts=None):
+        clauses, params = [], []
+        if start:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end:
+            clauses.append("timestamp <= ?")
+            params.append(end)
+        for column, values in (("loop_type", loop_types), ("context", contexts)):
+            if values:
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def count_by(self, column, **filters):
+        # [(value, rows, total duration in seconds)], largest groups first
+        if column not in GROUPABLE_COLUMNS:
+            raise ValueError(f"Can't group by {column}")
+        where, params = self._where(**filters)
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT {column}, COUNT(*), COALESCE(SUM(duration_sec), 0) FROM loop_log{where} "
+                f"GROUP BY {column} ORDER BY COUNT(*) DESC",
+                params
+            ).fetchall()
+
+    def recent(self, limit=10, **filters):
+        where, params = self._where(**filters)
+        with self._lock:
+            cursor = self._conn.execute(
+                f"SELECT {', '.join(COLUMN_ALIASES)} FROM loop_log{where} ORDER BY id DESC LIMIT ?",
+                params + [limit]
+            )
+            columns = [description[0] for description in cursor.description]
+            rows = [dict(zip(columns, values)) for values in cursor.fetchall()]
+        return rows[::-1]
+
+    def distinct(self, column):
+        if column not in GROUPABLE_COLUMNS:
+            raise ValueError(f"Unknown column {column}")
+        with self._lock:
+            return [value for (value,) in self._conn.execute(
+                f"SELECT DISTINCT {column} FROM loop_log WHERE {column} IS NOT NULL ORDER BY {column}"
+            )]
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(db_path):
+    # Shared store per database file, so repeated log calls reuse one connection
+    with _stores_lock:
+        if db_path not in _stores:
+            _stores[db_path] = SQLiteLogStore(db_path)
+        return _stores[db_path]
@@ -0,0 +1,34 @@
+import re
+from datetime import datetime
+
+# Log durations: a number with an optional unit (seconds when missing).
+# Shared with the vectorized parser in log_normalizer.
+DURATION_PATTERN = r"^\s*(?P<amount>\d+(?:\.\d+)?)\s*(?P<unit>min|m|sec|s)?\s*$"
+UNIT_SECONDS = {"min": 60, "m": 60, "sec": 1, "s": 1}
+_DURATION_RE = re.compile(DURATION_PATTERN, re.IGNORECASE)
+
+
+def parse_duration_sec(value):
+    # "6.7 min" / "30 sec" / "45s" / 12.5 -> seconds as a float, None if unparseable
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _DURATION_RE.match(str(value))
+    if not match:
+        return None
+    amount, unit = match.group("amount", "unit")
+    return float(amount) * UNIT_SECONDS[(unit or "sec").lower()]
+
+
+def parse_timestamp(value):
+    # Log timestamps are "YYYY-mm-dd HH:MM:SS"; very old rows only have a time of day
+    try:
+        return datetime.strptime(str(value).strip(), "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return None
+
+
+def is_parquet_path(file_path):
+    # Parquet log stores are directories named *.parquet
+    return str(file_path).rstrip("/\\").lower().endswith(".parquet")